@@ -0,0 +1,108 @@
+# cache.py — cache de consultas do dashboard, invalidado pela versão dos dados do SQLite
+import functools
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+import db
+
+MAX_ENTRADAS = 256
+MAX_BYTES = 64 * 1024 * 1024  # 64 MB
+
+
+def _tamanho(valor) -> int:
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True).sum())
+    if isinstance(valor, (list, tuple)):
+        return sys.getsizeof(valor) + sum(sys.getsizeof(v) for v in valor)
+    return sys.getsizeof(valor)
+
+
+class CacheConsultas:
+    # LRU limitado por número de entradas e por bytes, compartilhado entre sessões.
+    # As chaves incluem a versão dos dados (db.versao_dados): quando alguém grava no
+    # banco a versão muda e as entradas antigas são descartadas de uma vez.
+
+    def __init__(self, max_entradas: int = MAX_ENTRADAS, max_bytes: int = MAX_BYTES):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._entradas = OrderedDict()  # chave -> (valor, tamanho)
+        self._bytes = 0
+        self._versao = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _descartar(self, chave) -> None:
+        _, tamanho = self._entradas.pop(chave)
+        self._bytes -= tamanho
+
+    def obter(self, chave, carregar):
+        versao = db.versao_dados()
+        with self._lock:
+            if versao != self._versao:
+                self._entradas.clear()
+                self._bytes = 0
+                self._versao = versao
+            if chave in self._entradas:
+                self._entradas.move_to_end(chave)
+                self.hits += 1
+                return self._entradas[chave][0]
+            self.misses += 1
+
+        # a consulta roda fora do lock; duas sessões podem carregar a mesma chave ao mesmo tempo
+        valor = carregar()
+        tamanho = _tamanho(valor)
+
+        with self._lock:
+            if versao != self._versao or tamanho > self.max_bytes:
+                return valor
+            if chave in self._entradas:
+                self._descartar(chave)
+            self._entradas[chave] = (valor, tamanho)
+            self._bytes += tamanho
+            while len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes:
+                self._descartar(next(iter(self._entradas)))
+                self.evictions += 1
+        return valor
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+                "versao_dados": self._versao,
+            }
+
+
+_cache = CacheConsultas()
+
+
+def consulta(func):
+    # Decorator: memoiza o resultado por (função, argumentos, versão dos dados).
+    # DataFrames saem como cópia, para que o chamador possa alterá-los à vontade.
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        chave = (func.__qualname__, args, tuple(sorted(kwargs.items())))
+        valor = _cache.obter(chave, lambda: func(*args, **kwargs))
+        return valor.copy() if isinstance(valor, (pd.DataFrame, list)) else valor
+    return wrapper
+
+
+def estatisticas() -> dict:
+    return _cache.estatisticas()
+
+
+def limpar() -> None:
+    _cache.limpar()
@@ -0,0 +1,328 @@
+# contas.py — consultas e gravações da tabela contas
+import re
+from datetime import date
+
+import pandas as pd
+
+import cache
+import db
+
+STATUS_VALIDOS = ("Analise", "Aprovada", "Negada")
+
+# linhas por página no editor paginado (visão master)
+TAMANHO_PAGINA = 50
+
+COLUNAS_MASTER = ["ID", "Usuario", "Nome", "CNPJ", "Telefone", "Email", "Data", "Origem", "Status"]
+COLUNAS_USUARIO = ["ID", "Nome", "CNPJ", "Telefone", "Email", "Data", "Origem", "Status"]
+# consultas que alimentam o editor trazem também a versão da linha (oculta), usada
+# para detectar edições concorrentes ao salvar
+COLUNA_VERSAO = "Versao"
+
+# coluna exibida no editor -> coluna no banco (Usuario não é editável pelo editor)
+CAMPOS_EDITAVEIS = {
+    "Nome": "nome",
+    "CNPJ": "cnpj",
+    "Telefone": "telefone",
+    "Email": "email",
+    "Data": "data",
+    "Origem": "origem",
+    "Status": "status",
+}
+
+# ---------------------------
+# Leitura
+# ---------------------------
+
+@cache.consulta
+def carregar_meses(usuario: str | None = None) -> list:
+    # usuario=None -> todos os meses (visão master)
+    if usuario is None:
+        rows = db.consultar("SELECT DISTINCT mes FROM contas WHERE mes IS NOT NULL ORDER BY mes")
+    else:
+        rows = db.consultar(
+            "SELECT DISTINCT mes FROM contas WHERE usuario = ? AND mes IS NOT NULL ORDER BY mes",
+            (usuario,)
+        )
+    return [r[0] for r in rows]
+
+
+def _montar_df(dados: list, colunas: list) -> pd.DataFrame:
+    df = pd.DataFrame(dados, columns=colunas)
+    df["Data"] = pd.to_datetime(df["Data"], errors="coerce")
+    return df
+
+
+@cache.consulta
+def carregar_contas_mes(mes: str, usuario: str | None = None) -> pd.DataFrame:
+    # mantemos ID no df, mas NÃO exibimos ao usuário
+    if usuario is None:
+        dados = db.consultar("""
+            SELECT id, usuario, nome, cnpj, telefone, email, data, origem, status, versao
+            FROM contas
+            WHERE mes = ?
+            ORDER BY data, id
+        """, (mes,))
+        return _montar_df(dados, COLUNAS_MASTER + [COLUNA_VERSAO])
+    dados = db.consultar("""
+        SELECT id, nome, cnpj, telefone, email, data, origem, status, versao
+        FROM contas
+        WHERE usuario = ? AND mes = ?
+        ORDER BY data, id
+    """, (usuario, mes))
+    return _montar_df(dados, COLUNAS_USUARIO + [COLUNA_VERSAO])
+
+
+def _consulta_fts(texto: str) -> str:
+    # "12.345.678/0001 jose" -> '"12"* "345"* "678"* "0001"* "jose"*' (prefixos, todos obrigatórios);
+    # aspas evitam que o texto digitado seja interpretado como sintaxe do FTS5
+    termos = re.findall(r"\w+", texto or "")
+    return " ".join(f'"{t}"*' for t in termos)
+
+
+@cache.consulta
+def buscar(texto: str, usuario: str | None = None, limite: int = 50) -> pd.DataFrame:
+    # Busca textual (FTS5) em todos os meses, ordenada por relevância (nome pesa mais)
+    consulta_fts = _consulta_fts(texto)
+    if not consulta_fts:
+        return _montar_df([], COLUNAS_MASTER + [COLUNA_VERSAO])
+    sql = """
+        SELECT c.id, c.usuario, c.nome, c.cnpj, c.telefone, c.email, c.data, c.origem, c.status, c.versao
+        FROM contas_fts
+        JOIN contas c ON c.id = contas_fts.rowid
+        WHERE contas_fts MATCH ?
+    """
+    params = [consulta_fts]
+    if usuario is not None:
+        sql += " AND c.usuario = ?"
+        params.append(usuario)
+    sql += " ORDER BY bm25(contas_fts, 10.0, 5.0, 2.0, 2.0) LIMIT ?"
+    params.append(limite)
+    return _montar_df(db.consultar(sql, params), COLUNAS_MASTER + [COLUNA_VERSAO])
+
+
+def _filtro_mes(mes: str, usuario=None, status=None, origem=None, busca: str = "") -> tuple:
+    # monta o WHERE do editor paginado; None/"" = sem filtro naquele campo
+    condicoes = ["mes = ?"]
+    params = [mes]
+    if usuario is not None:
+        condicoes.append("usuario = ?")
+        params.append(usuario)
+    if status:
+        condicoes.append("status = ?")
+        params.append(status)
+    if origem is not None:
+        condicoes.append("IFNULL(origem, '') = ?")
+        params.append(origem)
+    consulta_fts = _consulta_fts(busca)
+    if consulta_fts:
+        condicoes.append("id IN (SELECT rowid FROM contas_fts WHERE contas_fts MATCH ?)")
+        params.append(consulta_fts)
+    return " AND ".join(condicoes), params
+
+
+@cache.consulta
+def contar_contas(mes: str, usuario=None, status=None, origem=None, busca: str = "") -> int:
+    where, params = _filtro_mes(mes, usuario, status, origem, busca)
+    return db.consultar(f"SELECT COUNT(*) FROM contas WHERE {where}", params)[0][0]
+
+
+@cache.consulta
+def carregar_pagina(mes: str, pagina: int, usuario=None, status=None, origem=None, busca: str = "",
+                    tamanho: int = TAMANHO_PAGINA) -> pd.DataFrame:
+    # só uma página de linhas sai do SQLite (e vai para o navegador); pagina começa em 1
+    where, params = _filtro_mes(mes, usuario, status, origem, busca)
+    dados = db.consultar(f"""
+        SELECT id, usuario, nome, cnpj, telefone, email, data, origem, status, versao
+        FROM contas
+        WHERE {where}
+        ORDER BY data, id
+        LIMIT ? OFFSET ?
+    """, params + [tamanho, (max(pagina, 1) - 1) * tamanho])
+    return _montar_df(dados, COLUNAS_MASTER + [COLUNA_VERSAO])
+
+
+@cache.consulta
+def carregar_usuarios_mes(mes: str) -> list:
+    rows = db.consultar(
+        "SELECT DISTINCT usuario FROM contas_resumo WHERE mes = ? ORDER BY usuario", (mes,)
+    )
+    return [r[0] for r in rows]
+
+
+@cache.consulta
+def carregar_origens_mes(mes: str) -> list:
+    # origem '' representa contas sem origem
+    rows = db.consultar(
+        "SELECT DISTINCT origem FROM contas_resumo WHERE mes = ? ORDER BY origem", (mes,)
+    )
+    return [r[0] for r in rows]
+
+
+@cache.consulta
+def contar_producao(mes: str, inicio: str, fim: str, status: tuple, usuario: str | None = None) -> int:
+    # contas do mês com data em [inicio, fim] (ISO) e status na lista
+    marcadores = ", ".join("?" * len(status))
+    sql = f"SELECT COUNT(*) FROM contas WHERE mes = ? AND data BETWEEN ? AND ? AND status IN ({marcadores})"
+    params = [mes, inicio, fim, *status]
+    if usuario is not None:
+        sql += " AND usuario = ?"
+        params.append(usuario)
+    return db.consultar(sql, params)[0][0]
+
+
+@cache.consulta
+def carregar_resumo(mes: str, usuario: str | None = None) -> pd.DataFrame:
+    # contagens por status/origem do agregado contas_resumo (mantido por triggers)
+    if usuario is None:
+        dados = db.consultar("""
+            SELECT status, origem, SUM(qtd)
+            FROM contas_resumo
+            WHERE mes = ?
+            GROUP BY status, origem
+        """, (mes,))
+    else:
+        dados = db.consultar("""
+            SELECT status, origem, qtd
+            FROM contas_resumo
+            WHERE mes = ? AND usuario = ?
+        """, (mes, usuario))
+    return pd.DataFrame(dados, columns=["Status", "Origem", "Qtd"])
+
+
+@cache.consulta
+def carregar_ranking(mes: str) -> pd.DataFrame:
+    dados = db.consultar("""
+        SELECT usuario, SUM(qtd) AS aprovadas
+        FROM contas_resumo
+        WHERE mes = ? AND status = 'Aprovada'
+        GROUP BY usuario
+        ORDER BY aprovadas DESC
+    """, (mes,))
+    return pd.DataFrame(dados, columns=["Usuário", "Contas Aprovadas"])
+
+# ---------------------------
+# Escrita
+# ---------------------------
+
+def _data_iso(valor) -> str | None:
+    parsed = pd.to_datetime(valor, errors="coerce")
+    return parsed.strftime("%Y-%m-%d") if not pd.isna(parsed) else None
+
+
+def _normalizar(campos: dict) -> dict:
+    status = campos.get("Status") or "Analise"
+    if status not in STATUS_VALIDOS:
+        status = "Analise"
+    return {
+        "nome": str(campos.get("Nome", "") or "").strip(),
+        "cnpj": str(campos.get("CNPJ", "") or ""),
+        "telefone": str(campos.get("Telefone", "") or ""),
+        "email": str(campos.get("Email", "") or ""),
+        "data": _data_iso(campos.get("Data")),
+        "origem": str(campos.get("Origem", "") or ""),
+        "status": status,
+    }
+
+
+def _conflito(conn, conta_id: int, nome: str, operacao: str) -> dict:
+    atual = conn.execute("SELECT atualizado_em FROM contas WHERE id = ?", (conta_id,)).fetchone()
+    if atual is None:
+        situacao = "removida por outro usuário"
+    else:
+        situacao = f"alterada por outro usuário ({atual[0] or 'data desconhecida'})"
+    return {"ID": conta_id, "Nome": nome, "Operação": operacao, "Situação": situacao}
+
+
+def salvar_alteracoes(mudancas: dict, ids: list, base: pd.DataFrame, usuario: str) -> dict:
+    # Grava só as linhas tocadas no editor, numa única transação (via escritor único).
+    # mudancas: estado do st.data_editor (edited_rows / added_rows / deleted_rows),
+    # indexado pela posição da linha exibida; ids e base seguem essa mesma ordem.
+    # Edições e remoções só valem se a linha ainda estiver na versão lida em base;
+    # as que não valerem voltam em "conflitos" e o restante é gravado normalmente.
+    registros_base = base.to_dict("records")
+    hoje_iso = date.today().strftime("%Y-%m-%d")
+
+    atualizacoes = []
+    for pos, alterados in (mudancas.get("edited_rows") or {}).items():
+        pos = int(pos)
+        if pos >= len(ids) or ids[pos] is None:
+            continue
+        original = registros_base[pos]
+        campos = {col: original.get(col) for col in CAMPOS_EDITAVEIS}
+        campos["Data"] = original.get("_data_iso")
+        campos.update(alterados)
+        linha = _normalizar(campos)
+        atualizacoes.append((
+            linha["nome"], linha["cnpj"], linha["telefone"], linha["email"],
+            linha["data"], linha["origem"], linha["status"], ids[pos], int(original[COLUNA_VERSAO])
+        ))
+
+    insercoes = []
+    for campos in mudancas.get("added_rows") or []:
+        linha = _normalizar(campos)
+        # exigimos nome não vazio; data ausente -> hoje
+        if not linha["nome"]:
+            continue
+        insercoes.append((
+            usuario, linha["nome"], linha["cnpj"], linha["telefone"], linha["email"],
+            linha["data"] or hoje_iso, linha["origem"], linha["status"]
+        ))
+
+    remocoes = [
+        (ids[int(pos)], int(registros_base[int(pos)][COLUNA_VERSAO]), registros_base[int(pos)].get("Nome"))
+        for pos in mudancas.get("deleted_rows") or []
+        if int(pos) < len(ids) and ids[int(pos)] is not None
+    ]
+
+    # data inválida/vazia numa edição -> COALESCE mantém a data gravada;
+    # versao/atualizado_em são avançados pelo trigger contas_versao_au
+    def gravar(conn):
+        conflitos = []
+        for params in atualizacoes:
+            alteradas = conn.execute("""
+                UPDATE contas SET nome = ?, cnpj = ?, telefone = ?, email = ?, data = COALESCE(?, data), origem = ?, status = ?
+                WHERE id = ? AND versao = ?
+            """, params).rowcount
+            if not alteradas:
+                conflitos.append(_conflito(conn, params[7], params[0], "edição"))
+        if insercoes:
+            conn.executemany("""
+                INSERT INTO contas (usuario, nome, cnpj, telefone, email, data, origem, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, insercoes)
+        for conta_id, versao, nome in remocoes:
+            if not conn.execute("DELETE FROM contas WHERE id = ? AND versao = ?", (conta_id, versao)).rowcount:
+                conflitos.append(_conflito(conn, conta_id, nome, "remoção"))
+        return conflitos
+
+    conflitos = db.escrever(gravar)
+    n_conflitos = {op: sum(c["Operação"] == op for c in conflitos) for op in ("edição", "remoção")}
+
+    return {
+        "atualizadas": len(atualizacoes) - n_conflitos["edição"],
+        "inseridas": len(insercoes),
+        "removidas": len(remocoes) - n_conflitos["remoção"],
+        "conflitos": conflitos,
+    }
+
+
+def remover_contas(ids: list, lote: int = 500) -> int:
+    # DELETE ... WHERE id IN (...) numa única transação; lotes respeitam o limite de parâmetros do SQLite
+    ids = [int(i) for i in ids]
+
+    def gravar(conn):
+        removidas = 0
+        for inicio in range(0, len(ids), lote):
+            parte = ids[inicio:inicio + lote]
+            marcadores = ", ".join("?" * len(parte))
+            removidas += conn.execute(f"DELETE FROM contas WHERE id IN ({marcadores})", parte).rowcount
+        return removidas
+
+    return db.escrever(gravar)
+
+
+def salvar_meta(mes: str, meta: int) -> None:
+    db.escrever(lambda conn: conn.execute("""
+        INSERT INTO metas_gerais (mes, meta) VALUES (?, ?)
+        ON CONFLICT(mes) DO UPDATE SET meta = excluded.meta
+    """, (mes, int(meta))))
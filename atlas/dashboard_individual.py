@@ -2,18 +2,23 @@ import streamlit as st
 import streamlit_authenticator as stauth
 import yaml
 from yaml.loader import SafeLoader
-import sqlite3
 import pandas as pd
 from datetime import date, datetime, timedelta
 import calendar
 import numpy as np
 import plotly.express as px
 import os
+import db
+import cache
+import sys
 from pathlib import Path
-
-# caminho absoluto para o DB (evita criar DBs diferentes por cwd)
-BASE_DIR = Path(__file__).resolve().parent
-DB_PATH = str(BASE_DIR / "comissao.db")
+# calendario.py e feriados.csv ficam em comum/, compartilhados com o first-atlas
+PASTA_COMUM = str(Path(__file__).resolve().parent.parent / "comum")
+if PASTA_COMUM not in sys.path:
+    sys.path.append(PASTA_COMUM)
+import calendario
+import contas
+import exportacao
 
 # ---------- Estilo ----------
 st.set_page_config(page_title="Dashboard de Contas", layout="wide")
@@ -69,84 +74,41 @@ elif authentication_status:
     user_role = config['credentials']['usernames'][username].get('role', 'operador')
 
     # ---------- Banco de dados ----------
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    cursor = conn.cursor()
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS contas (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        usuario TEXT NOT NULL,
-        nome TEXT NOT NULL,
-        cnpj TEXT,
-        telefone TEXT,
-        email TEXT,
-        data TEXT NOT NULL,
-        origem TEXT,
-        status TEXT CHECK(status IN ('Analise', 'Aprovada', 'Negada')) NOT NULL
-    )
-    """)
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS metas_gerais (
-        mes TEXT PRIMARY KEY,
-        meta INTEGER NOT NULL
-    )
-    """)
-    conn.commit()
-
-    # garantir coluna 'origem' em DB existente
-    cursor.execute("PRAGMA table_info(contas)")
-    existing_cols = [r[1] for r in cursor.fetchall()]
-    if "origem" not in existing_cols:
-        cursor.execute("ALTER TABLE contas ADD COLUMN origem TEXT")
-        conn.commit()
+    # leituras usam a conexão da thread (WAL); gravações vão para o escritor único de db.py
+    db.inicializar()
 
     # ---------- Página única: Visualização e edição (inserção via tabela) ----------
     st.title("📊 Visualização de contas")
 
-    if user_role == "master":
-        cursor.execute("SELECT DISTINCT strftime('%Y-%m', data) FROM contas")
-    else:
-        cursor.execute("SELECT DISTINCT strftime('%Y-%m', data) FROM contas WHERE usuario = ?", (name,))
+    def _resetar_editor(voltar_pagina=True):
+        # mudar filtro/página troca as linhas exibidas: descarta edições pendentes
+        st.session_state.pop("minhas_contas_editor", None)
+        if voltar_pagina:
+            st.session_state["pagina_editor"] = 1
 
-    meses_disponiveis = [row[0] for row in cursor.fetchall()]
+    usuario_filtro = None if user_role == "master" else name
+    meses_disponiveis = contas.carregar_meses(usuario_filtro)
 
     if meses_disponiveis:
         mes_selecionado = st.sidebar.selectbox(
             "📅 Selecione o mês",
             options=meses_disponiveis,
             index=0,
-            key="mes_selecionado"
+            key="mes_selecionado",
+            on_change=_resetar_editor
         )
     else:
         mes_selecionado = None
 
-    # Carregar dados do mês selecionado (mantemos ID no df, mas NÃO exibimos ao usuário)
+    # Variáveis derivadas necessárias para o Resumo Rápido (lidas do agregado contas_resumo)
     if mes_selecionado:
-        if user_role == "master":
-            cursor.execute("""
-                SELECT id, usuario, nome, cnpj, telefone, email, data, origem, status
-                FROM contas
-                WHERE strftime('%Y-%m', data) = ?
-                ORDER BY data, id
-            """, (mes_selecionado,))
-        else:
-            cursor.execute("""
-                SELECT id, nome, cnpj, telefone, email, data, origem, status
-                FROM contas
-                WHERE usuario = ? AND strftime('%Y-%m', data) = ?
-                ORDER BY data, id
-            """, (name, mes_selecionado))
-        dados = cursor.fetchall()
-        colunas = ["ID", "Usuario", "Nome", "CNPJ", "Telefone", "Email", "Data", "Origem", "Status"] if user_role == "master" else ["ID", "Nome", "CNPJ", "Telefone", "Email", "Data", "Origem", "Status"]
-        df = pd.DataFrame(dados, columns=colunas)
-        df["Data"] = pd.to_datetime(df["Data"], errors="coerce")
+        resumo = contas.carregar_resumo(mes_selecionado, usuario_filtro)
     else:
-        df = pd.DataFrame(columns=["ID", "Nome", "CNPJ", "Telefone", "Email", "Data", "Origem", "Status"])
-
-    # Variáveis derivadas necessárias para o Resumo Rápido
-    total_aprovadas = int(df[df["Status"] == "Aprovada"].shape[0]) if not df.empty else 0
-    analise_input = int(df[df["Status"] == "Analise"].shape[0]) if not df.empty else 0
+        resumo = pd.DataFrame(columns=["Status", "Origem", "Qtd"])
+    qtd_por_status = resumo.groupby("Status")["Qtd"].sum()
+    total_aprovadas = int(qtd_por_status.get("Aprovada", 0))
+    analise_input = int(qtd_por_status.get("Analise", 0))
+    total_contas = int(resumo["Qtd"].sum())
 
     # determinar início/fim do mês selecionado para cálculos de dias úteis
     if mes_selecionado:
@@ -159,40 +121,10 @@ elif authentication_status:
         fim_mes = inicio_mes
 
     # preparar lista de dias úteis do mês (pode ser usada por projeções)
-    dias_uteis_mes = pd.date_range(inicio_mes, fim_mes, freq="B")
+    dias_mes = pd.date_range(inicio_mes, fim_mes)
+    dias_uteis_mes = dias_mes[calendario.eh_dia_util(dias_mes)]
 
     # ---------- Funções utilitárias e constantes usadas nas projeções ----------
-    FERIADOS = []
-
-    def _to_date_obj(dt):
-        if pd.isna(dt):
-            return None
-        if isinstance(dt, date) and not isinstance(dt, datetime):
-            return dt
-        if isinstance(dt, datetime):
-            return dt.date()
-        if isinstance(dt, pd.Timestamp):
-            return dt.to_pydatetime().date()
-        try:
-            return pd.to_datetime(dt).date()
-        except Exception:
-            return None
-
-    def dias_uteis_inclusive(start_dt, end_dt, feriados=None):
-        fer = feriados or []
-        s = _to_date_obj(start_dt)
-        e = _to_date_obj(end_dt)
-        if s is None or e is None or s > e:
-            return 0
-        start_np = np.datetime64(s)
-        end_next_np = np.datetime64(e) + np.timedelta64(1, "D")
-        total = int(np.busday_count(start_np, end_next_np))
-        for f in fer:
-            f_date = _to_date_obj(f)
-            if f_date and s <= f_date <= e and np.is_busday(np.datetime64(f_date)):
-                total -= 1
-        return max(total, 0)
-
     def projecao_linear_uteis(atual, elapsed_business_days, total_business_days):
         ritmo_por_dia = atual / elapsed_business_days if elapsed_business_days > 0 else 0
         return ritmo_por_dia * total_business_days
@@ -244,12 +176,7 @@ elif authentication_status:
         meta_atual = st.sidebar.number_input("Meta geral do mês", min_value=1, value=1340, step=1)
         if mes_selecionado:
             if st.sidebar.button("Salvar meta do mês"):
-                cursor.execute("""
-                    INSERT INTO metas_gerais (mes, meta)
-                    VALUES (?, ?)
-                    ON CONFLICT(mes) DO UPDATE SET meta=excluded.meta
-                """, (mes_selecionado, meta_atual))
-                conn.commit()
+                contas.salvar_meta(mes_selecionado, meta_atual)
                 st.sidebar.success("Meta salva com sucesso.")
         else:
             st.sidebar.info("Selecione um mês para definir a meta.")
@@ -268,14 +195,13 @@ elif authentication_status:
     # ---------- Resumo Rápido ----------
     st.markdown("### Resumo Rápido")
     aprovadas_input = total_aprovadas
-    analise_input = int(df[df["Status"] == "Analise"].shape[0])
 
     first_day = inicio_mes.to_pydatetime().date()
     last_day = fim_mes.to_pydatetime().date()
     hoje_date = date.today()
 
-    dias_uteis_total = dias_uteis_inclusive(first_day, last_day, FERIADOS)
-    dias_uteis_passados = dias_uteis_inclusive(first_day, min(hoje_date, last_day), FERIADOS)
+    dias_uteis_total = int(calendario.dias_uteis_entre(first_day, last_day))
+    dias_uteis_passados = int(calendario.dias_uteis_entre(first_day, min(hoje_date, last_day)))
     dias_uteis_restantes = max(dias_uteis_total - dias_uteis_passados, 0)
     elapsed_business = dias_uteis_passados if dias_uteis_passados > 0 else 1
 
@@ -286,11 +212,11 @@ elif authentication_status:
     res_sem = calcular_comissao(projecao_sem_bonus, meta_atual, inclui_bonus=inclui_bonus_flag, pos=pos_ranking)
     res_com_analise = calcular_comissao(projecao_com_analise, meta_atual, inclui_bonus=inclui_bonus_flag, pos=pos_ranking)
 
-    hoje_dt = pd.to_datetime(date.today())
-    inicio_semana = hoje_dt - pd.Timedelta(days=hoje_dt.weekday())
-    if not df.empty:
-        producao_hoje = int(df[(df["Data"].dt.date == date.today()) & df["Status"].isin(["Aprovada", "Analise"])].shape[0])
-        producao_semana = int(df[(df["Data"] >= inicio_semana) & (df["Data"] <= hoje_dt) & (df["Status"] == "Aprovada")].shape[0])
+    hoje_iso = date.today().strftime("%Y-%m-%d")
+    inicio_semana_iso = (date.today() - timedelta(days=date.today().weekday())).strftime("%Y-%m-%d")
+    if total_contas > 0:
+        producao_hoje = contas.contar_producao(mes_selecionado, hoje_iso, hoje_iso, ("Aprovada", "Analise"), usuario_filtro)
+        producao_semana = contas.contar_producao(mes_selecionado, inicio_semana_iso, hoje_iso, ("Aprovada",), usuario_filtro)
     else:
         producao_hoje = 0
         producao_semana = 0
@@ -312,219 +238,195 @@ elif authentication_status:
     # ---------- Após resumo rápido: mostrar tabela de contas ----------
     st.subheader("Todas as Contas" if user_role == "master" else "Minhas Contas")
 
+    # Carregar dados do mês selecionado (mantemos ID no df, mas NÃO exibimos ao usuário)
+    if not mes_selecionado:
+        df = pd.DataFrame(columns=(contas.COLUNAS_MASTER if user_role == "master" else contas.COLUNAS_USUARIO) + [contas.COLUNA_VERSAO])
+    elif user_role == "master":
+        # master: filtros + paginação no SQLite; só a página atual vai para o editor
+        f1, f2, f3, f4 = st.columns([1, 1, 1, 2])
+        opcoes_usuario = ["Todos"] + contas.carregar_usuarios_mes(mes_selecionado)
+        opcoes_origem = ["Todas"] + contas.carregar_origens_mes(mes_selecionado)
+        filtro_usuario = f1.selectbox("Usuário", opcoes_usuario, key="filtro_usuario", on_change=_resetar_editor)
+        filtro_status = f2.selectbox("Status", ["Todos", "Analise", "Aprovada", "Negada"], key="filtro_status", on_change=_resetar_editor)
+        filtro_origem = f3.selectbox(
+            "Origem", opcoes_origem, key="filtro_origem", on_change=_resetar_editor,
+            format_func=lambda o: "(sem origem)" if o == "" else o
+        )
+        busca = f4.text_input("Buscar (nome, CNPJ, email ou telefone)", key="busca_editor", on_change=_resetar_editor)
+
+        filtros = dict(
+            usuario=None if filtro_usuario == "Todos" else filtro_usuario,
+            status=None if filtro_status == "Todos" else filtro_status,
+            origem=None if filtro_origem == "Todas" else filtro_origem,
+            busca=busca,
+        )
+        total_filtrado = contas.contar_contas(mes_selecionado, **filtros)
+        n_paginas = max(1, -(-total_filtrado // contas.TAMANHO_PAGINA))
+        if st.session_state.get("pagina_editor", 1) > n_paginas:
+            st.session_state["pagina_editor"] = 1
+        pagina = st.number_input(
+            "Página", min_value=1, max_value=n_paginas, step=1, key="pagina_editor",
+            on_change=_resetar_editor, args=(False,)
+        )
+        st.caption(f"{total_filtrado} contas encontradas — página {pagina} de {n_paginas}")
+        df = contas.carregar_pagina(mes_selecionado, int(pagina), **filtros)
+    else:
+        df = contas.carregar_contas_mes(mes_selecionado, usuario_filtro)
+
     # ---------- Tabela editável ----------
     df["Data"] = pd.to_datetime(df["Data"], errors="coerce")
 
-    # Preparar DataFrame para o editor (NÃO incluir ID coluna no que o usuário vê)
-    df_display = df.reset_index(drop=True).copy()
-    df_display["_data_iso"] = df_display["Data"].dt.strftime("%Y-%m-%d")
-
-    # ids_map: lista posicional de ids que correspondem às linhas mostradas
-    ids_map = []
-    if "ID" in df_display.columns and len(df_display) > 0:
-        for v in df_display["ID"].tolist():
-            try:
-                ids_map.append(int(v))
-            except Exception:
-                ids_map.append(None)
-    st.session_state["editor_ids"] = ids_map  # usado ao salvar
-
-    if user_role == "master" and "Usuario" in df_display.columns:
-        editor_df = df_display[["Usuario", "Nome", "CNPJ", "Telefone", "Email", "Data", "Origem", "Status"]].copy()
-    else:
-        editor_df = df_display[["Nome", "CNPJ", "Telefone", "Email", "Data", "Origem", "Status"]].copy()
+    COLUNAS_EDITOR = ["Nome", "CNPJ", "Telefone", "Email", "Data", "Origem", "Status"]
+    if user_role == "master":
+        COLUNAS_EDITOR = ["Usuario"] + COLUNAS_EDITOR
+    CONFIG_EDITOR = {
+        "Status": st.column_config.SelectboxColumn("Status", options=["Analise", "Aprovada", "Negada"]),
+        "Data": st.column_config.DateColumn("Data", format="DD/MM/YYYY")
+    }
+
+    def _preparar_base(df_origem):
+        # linhas exibidas + lista posicional de ids correspondentes (NÃO incluir ID no que o usuário vê)
+        base = df_origem.reset_index(drop=True).copy()
+        base["_data_iso"] = base["Data"].dt.strftime("%Y-%m-%d")
+        ids = [int(v) if pd.notna(v) else None for v in base["ID"].tolist()]
+        return base, ids
 
-    # incluir Origem imediatamente após Data para o usuário
-    #if "Origem" in df_display.columns:
-        #editor_df = df_display[["Nome", "CNPJ", "Telefone", "Email", "Data", "Origem", "Status"]].copy()
+    df_display, ids_map = _preparar_base(df)
 
-    edited_obj = st.data_editor(
-        editor_df,
+    st.data_editor(
+        df_display[COLUNAS_EDITOR],
         num_rows="dynamic",
         use_container_width=True,
-        column_config={
-            "Status": st.column_config.SelectboxColumn("Status", options=["Analise", "Aprovada", "Negada"]),
-            "Data": st.column_config.DateColumn("Data", format="DD/MM/YYYY")
-        },
+        column_config=CONFIG_EDITOR,
         key="minhas_contas_editor"
     )
 
-    # Função para normalizar payload do data_editor em DataFrame
-    def _edited_to_df(edited_obj):
-        if edited_obj is None:
-            return pd.DataFrame()
-        if isinstance(edited_obj, list):
-            return pd.DataFrame.from_records(edited_obj)
-        if isinstance(edited_obj, dict):
-            vals = list(edited_obj.values())
-            # caso col -> dict (indexado)
-            if all(isinstance(v, dict) for v in vals):
-                idx_keys = set()
-                for v in vals:
-                    idx_keys.update(v.keys())
-                try:
-                    idx_sorted = sorted(idx_keys, key=lambda x: int(x))
-                except Exception:
-                    idx_sorted = sorted(idx_keys, key=str)
-                rows = []
-                for k in idx_sorted:
-                    row = {}
-                    for col, coldict in edited_obj.items():
-                        if k in coldict:
-                            val = coldict[k]
-                        elif str(k) in coldict:
-                            val = coldict[str(k)]
-                        else:
-                            val = None
-                        row[col] = val
-                    rows.append(row)
-                return pd.DataFrame.from_records(rows)
-            # caso col -> list/iterable
-            lengths = []
-            for v in vals:
-                if hasattr(v, "__len__") and not isinstance(v, (str, bytes, bytearray)):
-                    lengths.append(len(v))
-                else:
-                    lengths.append(1)
-            maxlen = max(lengths) if lengths else 0
-            rows = []
-            for i in range(maxlen):
-                row = {}
-                for k, v in edited_obj.items():
-                    if hasattr(v, "__len__") and not isinstance(v, (str, bytes, bytearray)):
-                        row[k] = v[i] if i < len(v) else None
-                    else:
-                        row[k] = v
-                rows.append(row)
-            return pd.DataFrame.from_records(rows)
-        return pd.DataFrame(edited_obj)
-
-    # Salvar alterações ao clicar (botão único)
-    def _save_changes(edited_payload):
-        # usar diretamente o payload retornado por st.data_editor (evita discrepâncias no session_state)
-        edited_df_local = _edited_to_df(edited_payload)
-        if edited_df_local is None or edited_df_local.empty:
+    # Salvar alterações ao clicar
+    def _save_changes(chave_editor, base_df, ids):
+        # usa o conjunto de mudanças do próprio editor (edited_rows / added_rows / deleted_rows)
+        mudancas = st.session_state.get(chave_editor) or {}
+        if not any(mudancas.get(k) for k in ("edited_rows", "added_rows", "deleted_rows")):
             st.warning("Nada a salvar.")
             return
 
-        # abrir conexão usando caminho absoluto
-        local_conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-        local_cursor = local_conn.cursor()
-        try:
-            ids = st.session_state.get("editor_ids", [])
-            n_original = len(ids)
-
-            for pos, row in edited_df_local.reset_index(drop=True).iterrows():
-                nome = str(row.get("Nome", "") or "").strip()
-                # normalizar data -> ISO string; se inválida, usar None (não deixar NULL no DB)
-                try:
-                    parsed = pd.to_datetime(row.get("Data", None), errors="coerce")
-                    data_iso = parsed.strftime("%Y-%m-%d") if not pd.isna(parsed) else None
-                except Exception:
-                    data_iso = None
-
-                status = row.get("Status", "Analise") or "Analise"
-                if status not in ("Analise", "Aprovada", "Negada"):
-                    status = "Analise"
-
-                cnpj = str(row.get("CNPJ", "") or "")
-                telefone = str(row.get("Telefone", "") or "")
-                email = str(row.get("Email", "") or "")
-                origem = str(row.get("Origem", "") or "")
-
-                if pos < n_original:
-                    rec_id = ids[pos]
-                    if rec_id is None:
-                        # não havia ID — inserir (mas exigimos nome não vazio)
-                        if not nome:
-                            continue
-                        # fallback data para hoje se ausente
-                        if not data_iso:
-                            data_iso = date.today().strftime("%Y-%m-%d")
-                        local_cursor.execute("""
-                            INSERT INTO contas (usuario, nome, cnpj, telefone, email, data, origem, status)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                        """, (name, nome, cnpj, telefone, email, data_iso, origem, status))
-                        local_conn.commit()
-                    else:
-                        # atualizar registro existente
-                        if data_iso:
-                            local_cursor.execute("""
-                                UPDATE contas SET nome = ?, cnpj = ?, telefone = ?, email = ?, data = ?, origem = ?, status = ?
-                                WHERE id = ?
-                            """, (nome, cnpj, telefone, email, data_iso, origem, status, rec_id))
-                        else:
-                            local_cursor.execute("""
-                                UPDATE contas SET nome = ?, cnpj = ?, telefone = ?, email = ?, origem = ?, status = ?
-                                WHERE id = ?
-                            """, (nome, cnpj, telefone, email, origem, status, rec_id))
-                        local_conn.commit()
-                else:
-                    # nova linha (pos >= n_original): inserir se pelo menos Nome preenchido
-                    if not nome:
-                        continue
-                    if not data_iso:
-                        data_iso = date.today().strftime("%Y-%m-%d")
-                    local_cursor.execute("""
-                        INSERT INTO contas (usuario, nome, cnpj, telefone, email, data, origem, status)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (name, nome, cnpj, telefone, email, data_iso, origem, status))
-                    local_conn.commit()
-
-            # após salvar, forçar rerun para recarregar dados do DB (compatível)
-            import time as _time
-            # usar a API atual para definir query params
-            st.query_params = {"_saved": str(int(_time.time()))}
+        resultado = contas.salvar_alteracoes(mudancas, ids, base_df, name)
+        # descarta as mudanças pendentes do editor; o rerun recarrega os dados do DB
+        del st.session_state[chave_editor]
+        st.session_state["conflitos_edicao"] = resultado["conflitos"]
+        if resultado["conflitos"]:
+            st.warning("Algumas alterações não foram salvas — veja os conflitos abaixo da tabela.")
+        else:
             st.success("Alterações salvas.")
-        finally:
-            local_conn.close()
 
-    # passar o objeto retornado por st.data_editor como argumento para a callback
-    st.button("Salvar alterações", key="salvar_alteracoes", on_click=_save_changes, args=(edited_obj,))
+    # passar as linhas exibidas como argumento para a callback (posições do editor -> ids)
+    st.button(
+        "Salvar alterações", key="salvar_alteracoes", on_click=_save_changes,
+        args=("minhas_contas_editor", df_display, ids_map)
+    )
+
+    # contas que outra pessoa alterou/removeu depois de serem abertas aqui (concorrência otimista)
+    conflitos_edicao = st.session_state.get("conflitos_edicao")
+    if conflitos_edicao:
+        st.warning(
+            f"{len(conflitos_edicao)} alteração(ões) não foram gravadas porque a conta mudou desde que "
+            "você a abriu. A tabela já mostra os dados atuais; revise e edite de novo se necessário."
+        )
+        st.dataframe(pd.DataFrame(conflitos_edicao), hide_index=True, use_container_width=True)
+        st.button("Ok, entendi", key="fechar_conflitos", on_click=lambda: st.session_state.pop("conflitos_edicao", None))
+
+    # ---------- Busca em todos os meses (FTS) ----------
+    busca_global = st.text_input(
+        "🔎 Buscar conta em todos os meses (nome, CNPJ, email ou telefone)",
+        key="busca_global",
+        on_change=lambda: st.session_state.pop("busca_resultados_editor", None)
+    )
+    df_busca = None
+    if busca_global.strip():
+        df_busca = contas.buscar(busca_global, usuario_filtro)
+        if df_busca.empty:
+            st.info("Nenhuma conta encontrada.")
+        else:
+            busca_display, busca_ids = _preparar_base(df_busca)
+            st.data_editor(
+                busca_display[COLUNAS_EDITOR],
+                num_rows="fixed",
+                use_container_width=True,
+                column_config=CONFIG_EDITOR,
+                key="busca_resultados_editor"
+            )
+            st.button(
+                "Salvar alterações da busca", key="salvar_alteracoes_busca", on_click=_save_changes,
+                args=("busca_resultados_editor", busca_display, busca_ids)
+            )
+
+    def _remover_contas(ids_remover):
+        removidas = contas.remover_contas(ids_remover)
+        st.session_state["remover_select"] = []
+        st.success(f"{removidas} conta(s) removida(s).")
+
+    def _selecionar_todas(ids_todas):
+        st.session_state["remover_select"] = ids_todas
 
     # Remover contas — expander compacto para economizar espaço
+    # (com uma busca ativa, as opções são os resultados da busca)
+    df_remocao = df_busca if df_busca is not None else df
     with st.expander("🗑️ Remover contas (clique para abrir)", expanded=False):
-        if df.empty:
-            st.write("Sem contas para remover neste mês.")
+        if df_remocao.empty:
+            st.write("Sem contas para remover." if df_busca is not None else "Sem contas para remover neste mês.")
         else:
-            # criar lista compacta de opções visíveis ao usuário
-            opts = []
-            ids = []
-            for _, r in df.reset_index(drop=True).iterrows():
-                data_display = r["Data"].strftime("%d/%m/%Y") if not pd.isna(r["Data"]) else "sem data"
-                opts.append(f"{r['Nome']} — {data_display} — {r.get('Status','')}")
-                ids.append(r["ID"])
-
-            choice = st.selectbox("Selecione a conta", options=[""] + opts, key="remover_select")
-            if choice:
-                sel_idx = opts.index(choice)
-                sel_id = ids[sel_idx]
-                st.markdown(f"**Selecionado:** {choice}")
-                cols = st.columns([4,1])
-                with cols[1]:
-                    if st.button("Remover", key=f"confirm_remover_{sel_id}"):
-                        cursor.execute("DELETE FROM contas WHERE id = ?", (sel_id,))
-                        conn.commit()
-                        st.success("Conta removida.")
-                        # forçar recarregamento para atualizar a tabela
-                        import time as _time
-                        st.query_params = {"_removed": str(int(_time.time()))}
-    import io
-
-    import io
-
-    if authentication_status and user_role == "master" and not df.empty:
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            df.to_excel(writer, index=False, sheet_name='Contas')
-        output.seek(0)
-
-        st.download_button(
-            label="📥 Exportar todas as contas (Excel)",
-            data=output,
-            file_name="contas_completas.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+            # rótulos montados de forma vetorizada e indexados pelo ID da conta
+            datas_remocao = df_remocao["Data"].dt.strftime("%d/%m/%Y").fillna("sem data")
+            rotulos = (
+                df_remocao["Nome"].astype(str) + " — " + datas_remocao + " — " + df_remocao["Status"].fillna("").astype(str)
+            )
+            opcoes_remocao = dict(zip(df_remocao["ID"].astype(int).tolist(), rotulos.tolist()))
+            # seleção de outro mês/página/busca não vale para as opções atuais
+            st.session_state["remover_select"] = [
+                i for i in st.session_state.get("remover_select", []) if i in opcoes_remocao
+            ]
+
+            selecionados = st.multiselect(
+                "Selecione as contas",
+                options=list(opcoes_remocao),
+                format_func=opcoes_remocao.get,
+                key="remover_select"
+            )
+            cols = st.columns([3, 1, 1])
+            with cols[1]:
+                st.button(
+                    "Selecionar todas", key="remover_todas", on_click=_selecionar_todas,
+                    args=(list(opcoes_remocao),)
+                )
+            with cols[2]:
+                st.button(
+                    f"Remover ({len(selecionados)})", key="confirm_remover", on_click=_remover_contas,
+                    args=(selecionados,), disabled=not selecionados
+                )
+    # Exportação sob demanda: o arquivo só é gerado ao clicar e fica em cache até a próxima gravação
+    if user_role == "master" and meses_disponiveis:
+        with st.expander("📥 Exportar contas", expanded=False):
+            e1, e2 = st.columns([1, 2])
+            formato_export = e1.selectbox(
+                "Formato", exportacao.formatos_disponiveis(), format_func=exportacao.rotulo, key="export_formato"
+            )
+            meses_export = e2.multiselect(
+                "Meses (vazio = todos)", meses_disponiveis,
+                default=[mes_selecionado] if mes_selecionado else [], key="export_meses"
+            )
+            if st.button("Gerar arquivo", key="export_gerar"):
+                st.session_state["export_pedido"] = (formato_export, tuple(sorted(meses_export)))
+
+            pedido = st.session_state.get("export_pedido")
+            if pedido:
+                with st.spinner("Gerando arquivo..."):
+                    conteudo = exportacao.gerar_arquivo(*pedido)
+                st.download_button(
+                    label=f"📥 Baixar {exportacao.rotulo(pedido[0])}",
+                    data=conteudo,
+                    file_name=exportacao.nome_arquivo(*pedido),
+                    mime=exportacao.mime(pedido[0]),
+                    on_click=lambda: st.session_state.pop("export_pedido", None)
+                )
 
 
     # Título da seção de projeções
@@ -557,12 +459,15 @@ elif authentication_status:
     st.markdown("---")
     # ---------- Gráficos: Origem (pizza) e Conversão (aprovadas vs total) ----------
     st.markdown("### Análise rápida")
-    if df.empty:
+    if total_contas == 0:
         st.info("Sem dados para gerar gráficos neste mês.")
     else:
         # Origem: distribuição percentual (tons progressivos de azul)
-        origin_series = df["Origem"].fillna("Desconhecida").astype(str)
-        origin_counts = origin_series.value_counts()
+        origin_counts = (
+            resumo.assign(Origem=resumo["Origem"].replace("", "Desconhecida"))
+            .groupby("Origem")["Qtd"].sum()
+            .sort_values(ascending=False)
+        )
         fig_origin = px.pie(
             names=origin_counts.index,
             values=origin_counts.values,
@@ -573,7 +478,7 @@ elif authentication_status:
         fig_origin.update_traces(textposition="inside", textinfo="percent+label")
 
         aprovadas_cnt = total_aprovadas
-        outras_cnt = int(df[df["Status"] != "Aprovada"].shape[0]) if not df.empty else 0
+        outras_cnt = total_contas - total_aprovadas
 
         # Conversão: usar dois tons de azul
         conv_colors = ["#6baed6", "#08306b"]
@@ -593,15 +498,7 @@ elif authentication_status:
             st.plotly_chart(fig_conv, use_container_width=True)
 
     if user_role == "master" and mes_selecionado:
-        cursor.execute("""
-            SELECT usuario, COUNT(*) as aprovadas
-            FROM contas
-            WHERE status = 'Aprovada' AND strftime('%Y-%m', data) = ?
-            GROUP BY usuario
-            ORDER BY aprovadas DESC
-        """, (mes_selecionado,))
-        ranking_dados = cursor.fetchall()
-        df_ranking = pd.DataFrame(ranking_dados, columns=["Usuário", "Contas Aprovadas"])
+        df_ranking = contas.carregar_ranking(mes_selecionado)
 
         # Redefinir o índice para começar em 1
         df_ranking.index = range(1, len(df_ranking) + 1)
@@ -657,8 +554,9 @@ elif authentication_status:
     for r in recs:
         st.write("- " + r)
 
+    if user_role == "master":
+        with st.sidebar.expander("Cache de consultas", expanded=False):
+            st.json(cache.estatisticas())
+
     # botão Sair no final da sidebar
     authenticator.logout("Sair", "sidebar")
-
-
-    conn.close()
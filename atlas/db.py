@@ -0,0 +1,444 @@
+# db.py — camada de conexão com o SQLite (comissao.db)
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+
+# caminho absoluto para o DB (evita criar DBs diferentes por cwd)
+BASE_DIR = Path(__file__).resolve().parent
+DB_PATH = str(BASE_DIR / "comissao.db")
+
+# Tempo máximo de espera pelo lock de escrita antes de "database is locked"
+BUSY_TIMEOUT_MS = 10000
+
+# Pragmas aplicados em toda conexão nova.
+# WAL: leitores não bloqueiam o escritor (e vice-versa); synchronous=NORMAL é seguro em WAL.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",      # ~16 MB de cache de páginas por conexão
+    "PRAGMA mmap_size=134217728",    # 128 MB de leitura via mmap
+    "PRAGMA foreign_keys=ON",
+)
+
+# Conexões de leitura do processo: o Streamlit roda cada rerun numa thread nova,
+# então uma conexão por thread seria reaberta (com todos os PRAGMAs) a cada rerun.
+# As conexões ficam num pool limitado, compartilhado por todas as sessões.
+MAX_CONEXOES_LEITURA = 8
+TIMEOUT_POOL_S = 30
+
+_pool_leitura = queue.LifoQueue()
+_pool_criadas = 0
+_pool_lock = threading.Lock()
+_init_lock = threading.Lock()
+_inicializado = False
+_sentinela = None
+_sentinela_lock = threading.Lock()
+
+
+def _nova_conexao() -> sqlite3.Connection:
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+# ---------------------------
+# Migrações de schema
+# ---------------------------
+# Cada passo é idempotente e roda uma única vez, na ordem da lista; o número
+# do último passo aplicado fica gravado em PRAGMA user_version.
+# Para mudar o schema, acrescente um passo no FINAL da lista (nunca reordene).
+
+def _colunas(conn: sqlite3.Connection, tabela: str) -> list:
+    return [r[1] for r in conn.execute(f"PRAGMA table_info({tabela})").fetchall()]
+
+
+def _m001_tabelas_iniciais(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS contas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        usuario TEXT NOT NULL,
+        nome TEXT NOT NULL,
+        cnpj TEXT,
+        telefone TEXT,
+        email TEXT,
+        data TEXT NOT NULL,
+        origem TEXT,
+        status TEXT CHECK(status IN ('Analise', 'Aprovada', 'Negada')) NOT NULL
+    )
+    """)
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS metas_gerais (
+        mes TEXT PRIMARY KEY,
+        meta INTEGER NOT NULL
+    )
+    """)
+
+
+def _m002_coluna_origem(conn: sqlite3.Connection) -> None:
+    # garantir coluna 'origem' em DB criado antes dela existir
+    if "origem" not in _colunas(conn, "contas"):
+        conn.execute("ALTER TABLE contas ADD COLUMN origem TEXT")
+
+
+def _m003_coluna_mes(conn: sqlite3.Connection) -> None:
+    # coluna 'mes' (YYYY-MM) indexável; substitui strftime('%Y-%m', data) nos filtros.
+    # Em DB existente, adiciona a coluna e faz o backfill.
+    if "mes" not in _colunas(conn, "contas"):
+        conn.execute("ALTER TABLE contas ADD COLUMN mes TEXT")
+        conn.execute("UPDATE contas SET mes = strftime('%Y-%m', data)")
+
+    # mantém 'mes' sincronizado com 'data' para qualquer escritor
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS contas_mes_ai AFTER INSERT ON contas
+    BEGIN
+        UPDATE contas SET mes = strftime('%Y-%m', NEW.data) WHERE id = NEW.id;
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS contas_mes_au AFTER UPDATE OF data ON contas
+    BEGIN
+        UPDATE contas SET mes = strftime('%Y-%m', NEW.data) WHERE id = NEW.id;
+    END
+    """)
+
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_contas_usuario_mes ON contas(usuario, mes)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_contas_mes_status ON contas(mes, status)")
+
+
+def _m004_resumo_mensal(conn: sqlite3.Connection) -> None:
+    # Agregado (mes, usuario, status, origem) -> qtd mantido por triggers, para que
+    # KPIs, pizzas e ranking leiam O(usuários) linhas em vez de varrer o mês inteiro.
+    # origem NULL é gravada como '' (faz parte da chave primária).
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS contas_resumo (
+        mes TEXT NOT NULL,
+        usuario TEXT NOT NULL,
+        status TEXT NOT NULL,
+        origem TEXT NOT NULL,
+        qtd INTEGER NOT NULL,
+        PRIMARY KEY (mes, usuario, status, origem)
+    ) WITHOUT ROWID
+    """)
+
+    # 'mes' é calculado a partir de data: o trigger de contas.mes pode rodar depois destes
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS contas_resumo_ai AFTER INSERT ON contas
+    BEGIN
+        INSERT INTO contas_resumo (mes, usuario, status, origem, qtd)
+        SELECT strftime('%Y-%m', NEW.data), NEW.usuario, NEW.status, IFNULL(NEW.origem, ''), 1
+        WHERE strftime('%Y-%m', NEW.data) IS NOT NULL
+        ON CONFLICT (mes, usuario, status, origem) DO UPDATE SET qtd = qtd + 1;
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS contas_resumo_ad AFTER DELETE ON contas
+    BEGIN
+        UPDATE contas_resumo SET qtd = qtd - 1
+        WHERE mes = strftime('%Y-%m', OLD.data) AND usuario = OLD.usuario
+          AND status = OLD.status AND origem = IFNULL(OLD.origem, '');
+        DELETE FROM contas_resumo
+        WHERE mes = strftime('%Y-%m', OLD.data) AND usuario = OLD.usuario
+          AND status = OLD.status AND origem = IFNULL(OLD.origem, '') AND qtd <= 0;
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS contas_resumo_au AFTER UPDATE OF data, usuario, status, origem ON contas
+    BEGIN
+        UPDATE contas_resumo SET qtd = qtd - 1
+        WHERE mes = strftime('%Y-%m', OLD.data) AND usuario = OLD.usuario
+          AND status = OLD.status AND origem = IFNULL(OLD.origem, '');
+        DELETE FROM contas_resumo
+        WHERE mes = strftime('%Y-%m', OLD.data) AND usuario = OLD.usuario
+          AND status = OLD.status AND origem = IFNULL(OLD.origem, '') AND qtd <= 0;
+        INSERT INTO contas_resumo (mes, usuario, status, origem, qtd)
+        SELECT strftime('%Y-%m', NEW.data), NEW.usuario, NEW.status, IFNULL(NEW.origem, ''), 1
+        WHERE strftime('%Y-%m', NEW.data) IS NOT NULL
+        ON CONFLICT (mes, usuario, status, origem) DO UPDATE SET qtd = qtd + 1;
+    END
+    """)
+
+    # backfill a partir das linhas existentes
+    conn.execute("DELETE FROM contas_resumo")
+    conn.execute("""
+    INSERT INTO contas_resumo (mes, usuario, status, origem, qtd)
+    SELECT strftime('%Y-%m', data), usuario, status, IFNULL(origem, ''), COUNT(*)
+    FROM contas
+    WHERE strftime('%Y-%m', data) IS NOT NULL
+    GROUP BY 1, 2, 3, 4
+    """)
+
+
+# texto indexado de CNPJ/telefone: valor original + só os dígitos, para que
+# "12.345.678" e "12345678" encontrem a mesma conta
+_FTS_CNPJ = "IFNULL({0}.cnpj, '') || ' ' || replace(replace(replace(replace(IFNULL({0}.cnpj, ''), '.', ''), '/', ''), '-', ''), ' ', '')"
+_FTS_TELEFONE = "IFNULL({0}.telefone, '') || ' ' || replace(replace(replace(replace(replace(IFNULL({0}.telefone, ''), '(', ''), ')', ''), '-', ''), ' ', ''), '+', '')"
+
+
+def _m005_busca_textual(conn: sqlite3.Connection) -> None:
+    # Índice FTS5 (rowid = contas.id) sobre nome, CNPJ, email e telefone, mantido por triggers
+    conn.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS contas_fts USING fts5(
+        nome, cnpj, email, telefone,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """)
+
+    inserir = f"""
+        INSERT INTO contas_fts (rowid, nome, cnpj, email, telefone)
+        VALUES (NEW.id, NEW.nome, {_FTS_CNPJ.format("NEW")}, IFNULL(NEW.email, ''), {_FTS_TELEFONE.format("NEW")});
+    """
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS contas_fts_ai AFTER INSERT ON contas
+    BEGIN
+        {inserir}
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS contas_fts_ad AFTER DELETE ON contas
+    BEGIN
+        DELETE FROM contas_fts WHERE rowid = OLD.id;
+    END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS contas_fts_au AFTER UPDATE OF nome, cnpj, email, telefone ON contas
+    BEGIN
+        DELETE FROM contas_fts WHERE rowid = OLD.id;
+        {inserir}
+    END
+    """)
+
+    # backfill a partir das linhas existentes
+    conn.execute("DELETE FROM contas_fts")
+    conn.execute(f"""
+    INSERT INTO contas_fts (rowid, nome, cnpj, email, telefone)
+    SELECT id, nome, {_FTS_CNPJ.format("contas")}, IFNULL(email, ''), {_FTS_TELEFONE.format("contas")}
+    FROM contas
+    """)
+
+
+def _m006_versao_linha(conn: sqlite3.Connection) -> None:
+    # Concorrência otimista: cada conta tem um número de versão, incrementado a cada
+    # alteração por qualquer escritor (trigger). Quem grava envia a versão que leu
+    # (WHERE id = ? AND versao = ?); 0 linhas afetadas = alguém alterou/removeu antes.
+    colunas = _colunas(conn, "contas")
+    if "versao" not in colunas:
+        conn.execute("ALTER TABLE contas ADD COLUMN versao INTEGER NOT NULL DEFAULT 1")
+    if "atualizado_em" not in colunas:
+        conn.execute("ALTER TABLE contas ADD COLUMN atualizado_em TEXT")
+
+    # só dispara quando o próprio UPDATE não mexeu na versão (o UPDATE interno, que
+    # toca só versao/atualizado_em, não reaciona os triggers de mes/resumo/fts)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS contas_versao_au
+    AFTER UPDATE OF usuario, nome, cnpj, telefone, email, data, origem, status ON contas
+    WHEN NEW.versao = OLD.versao
+    BEGIN
+        UPDATE contas SET versao = OLD.versao + 1, atualizado_em = datetime('now')
+        WHERE id = NEW.id;
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS contas_versao_ai AFTER INSERT ON contas
+    WHEN NEW.atualizado_em IS NULL
+    BEGIN
+        UPDATE contas SET atualizado_em = datetime('now') WHERE id = NEW.id;
+    END
+    """)
+
+
+MIGRACOES = [
+    _m001_tabelas_iniciais,
+    _m002_coluna_origem,
+    _m003_coluna_mes,
+    _m004_resumo_mensal,
+    _m005_busca_textual,
+    _m006_versao_linha,
+]
+
+
+def versao_schema(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrar(conn: sqlite3.Connection) -> int:
+    # Aplica os passos pendentes, cada um na sua própria transação junto com o
+    # novo user_version. A versão é relida após o BEGIN IMMEDIATE para que dois
+    # processos subindo juntos não apliquem o mesmo passo duas vezes.
+    for numero, passo in enumerate(MIGRACOES, start=1):
+        if numero <= versao_schema(conn):
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if numero > versao_schema(conn):
+                passo(conn)
+                conn.execute(f"PRAGMA user_version = {numero}")
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+    conn.execute("PRAGMA optimize")
+    return versao_schema(conn)
+
+
+def inicializar() -> None:
+    # Executa as migrações uma única vez por processo (não a cada rerun do Streamlit)
+    global _inicializado
+    if _inicializado:
+        return
+    with _init_lock:
+        if _inicializado:
+            return
+        conn = _nova_conexao()
+        try:
+            migrar(conn)
+        finally:
+            conn.close()
+        _inicializado = True
+
+
+def _pegar_conexao() -> sqlite3.Connection:
+    global _pool_criadas
+    try:
+        return _pool_leitura.get_nowait()
+    except queue.Empty:
+        pass
+    with _pool_lock:
+        criar = _pool_criadas < MAX_CONEXOES_LEITURA
+        if criar:
+            _pool_criadas += 1
+    if not criar:
+        # pool no limite: espera outra sessão devolver uma conexão
+        return _pool_leitura.get(timeout=TIMEOUT_POOL_S)
+    try:
+        return _nova_conexao()
+    except Exception:
+        with _pool_lock:
+            _pool_criadas -= 1
+        raise
+
+
+@contextmanager
+def leitura():
+    # Empresta uma conexão de leitura do pool e a devolve ao sair do bloco.
+    # Uso: with db.leitura() as conn: ...
+    inicializar()
+    conn = _pegar_conexao()
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        _pool_leitura.put(conn)
+
+
+def consultar(sql: str, params=()) -> list:
+    # atalho para uma consulta só: executa numa conexão do pool e devolve fetchall()
+    with leitura() as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def versao_dados() -> int:
+    # Token barato de mudança do banco: PRAGMA data_version de uma conexão sentinela
+    # que nunca grava muda a cada commit feito por qualquer outra conexão
+    # (outras threads ou outros processos). Usado como parte da chave do cache.
+    global _sentinela
+    with _sentinela_lock:
+        if _sentinela is None:
+            inicializar()
+            _sentinela = _nova_conexao()
+        return _sentinela.execute("PRAGMA data_version").fetchone()[0]
+
+
+# ---------------------------
+# Escritor único
+# ---------------------------
+# Todas as gravações passam por uma fila atendida por uma única thread com conexão
+# própria. Pedidos que chegam dentro de JANELA_ESCRITA_S viram uma só transação
+# (um único fsync/lock de escrita); cada pedido roda num SAVEPOINT, então o erro
+# de um não desfaz os outros. Sessões do Streamlit não disputam mais o lock.
+
+JANELA_ESCRITA_S = 0.02
+MAX_PEDIDOS_POR_TRANSACAO = 64
+TIMEOUT_ESCRITA_S = 60
+
+_fila_escrita = queue.Queue()
+_escritor = None
+_escritor_lock = threading.Lock()
+
+
+def _aplicar_lote(conn: sqlite3.Connection, pedidos: list) -> None:
+    resultados = []
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        for funcao, futuro in pedidos:
+            conn.execute("SAVEPOINT pedido")
+            try:
+                valor = funcao(conn)
+            except Exception as erro:
+                conn.execute("ROLLBACK TO pedido")
+                conn.execute("RELEASE pedido")
+                resultados.append((futuro, None, erro))
+            else:
+                conn.execute("RELEASE pedido")
+                resultados.append((futuro, valor, None))
+        conn.commit()
+    except Exception as erro:
+        # falha da transação como um todo (commit, lock): todos os pedidos do lote falham
+        if conn.in_transaction:
+            conn.rollback()
+        for _, futuro in pedidos:
+            futuro.set_exception(erro)
+        return
+
+    for futuro, valor, erro in resultados:
+        if erro is not None:
+            futuro.set_exception(erro)
+        else:
+            futuro.set_result(valor)
+
+
+def _loop_escritor() -> None:
+    conn = _nova_conexao()
+    while True:
+        pedidos = [_fila_escrita.get()]
+        limite = time.monotonic() + JANELA_ESCRITA_S
+        while len(pedidos) < MAX_PEDIDOS_POR_TRANSACAO:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                pedidos.append(_fila_escrita.get(timeout=restante))
+            except queue.Empty:
+                break
+        _aplicar_lote(conn, pedidos)
+
+
+def escrever(funcao, timeout: float = TIMEOUT_ESCRITA_S):
+    # Enfileira funcao(conn) para o escritor e espera o commit; devolve o retorno
+    # dela ou relança o erro. funcao não deve chamar commit/rollback.
+    global _escritor
+    inicializar()
+    with _escritor_lock:
+        if _escritor is None or not _escritor.is_alive():
+            _escritor = threading.Thread(target=_loop_escritor, name="atlas-escritor", daemon=True)
+            _escritor.start()
+    futuro = Future()
+    _fila_escrita.put((funcao, futuro))
+    return futuro.result(timeout)
+
+
+if __name__ == "__main__":
+    # python db.py -> aplica as migrações pendentes e mostra a versão do schema
+    conexao = _nova_conexao()
+    try:
+        print(f"{DB_PATH}: schema na versão {migrar(conexao)} de {len(MIGRACOES)}")
+    finally:
+        conexao.close()
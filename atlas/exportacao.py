@@ -0,0 +1,113 @@
+# exportacao.py — arquivos de exportação de contas, gerados sob demanda
+import io
+
+import pandas as pd
+
+import cache
+import db
+from contas import COLUNAS_MASTER
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # sem pyarrow a opção Parquet não aparece
+    pa = pq = None
+
+# linhas lidas do SQLite por vez; nenhum formato carrega todas as contas de uma vez
+TAMANHO_LOTE = 5000
+
+FORMATOS = {
+    "xlsx": ("Excel (.xlsx)", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": ("CSV (.csv)", "text/csv"),
+    "parquet": ("Parquet (.parquet)", "application/octet-stream"),
+}
+
+
+def formatos_disponiveis() -> list:
+    return [f for f in FORMATOS if f != "parquet" or pq is not None]
+
+
+def rotulo(formato: str) -> str:
+    return FORMATOS[formato][0]
+
+
+def mime(formato: str) -> str:
+    return FORMATOS[formato][1]
+
+
+def nome_arquivo(formato: str, meses: tuple, usuario: str | None = None) -> str:
+    if not meses:
+        periodo = "todos_meses"
+    elif len(meses) == 1:
+        periodo = meses[0]
+    else:
+        periodo = f"{meses[0]}_a_{meses[-1]}"
+    sufixo = f"_{usuario}" if usuario else ""
+    return f"contas_{periodo}{sufixo}.{formato}"
+
+
+def _lotes(meses: tuple, usuario: str | None):
+    # meses vazio -> todos os meses
+    condicoes, params = [], []
+    if meses:
+        condicoes.append(f"mes IN ({', '.join('?' * len(meses))})")
+        params.extend(meses)
+    if usuario is not None:
+        condicoes.append("usuario = ?")
+        params.append(usuario)
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    sql = f"""
+        SELECT id, usuario, nome, cnpj, telefone, email, data, origem, status
+        FROM contas
+        {where}
+        ORDER BY mes, data, id
+    """
+    # a conexão fica emprestada enquanto os lotes são consumidos
+    with db.leitura() as conn:
+        for lote in pd.read_sql_query(sql, conn, params=params, chunksize=TAMANHO_LOTE):
+            lote.columns = COLUNAS_MASTER
+            lote["Data"] = pd.to_datetime(lote["Data"], errors="coerce")
+            yield lote
+
+
+def _csv(lotes) -> bytes:
+    # ";" + BOM para abrir direto no Excel em pt-BR
+    saida = io.BytesIO()
+    saida.write(pd.DataFrame(columns=COLUNAS_MASTER).to_csv(index=False, sep=";").encode("utf-8-sig"))
+    for lote in lotes:
+        saida.write(lote.to_csv(index=False, header=False, sep=";", date_format="%d/%m/%Y").encode("utf-8"))
+    return saida.getvalue()
+
+
+def _parquet(lotes) -> bytes:
+    # schema fixo: um lote só com nulos numa coluna não pode mudar o tipo dela
+    schema = pa.schema(
+        [("ID", pa.int64())]
+        + [(c, pa.string()) for c in COLUNAS_MASTER[1:] if c != "Data"]
+        + [("Data", pa.timestamp("ns"))]
+    )
+    saida = io.BytesIO()
+    with pq.ParquetWriter(saida, schema, compression="zstd") as writer:
+        for lote in lotes:
+            writer.write_table(pa.Table.from_pandas(lote, schema=schema, preserve_index=False))
+    return saida.getvalue()
+
+
+def _xlsx(lotes) -> bytes:
+    # o xlsxwriter mantém a pasta em memória; para meses grandes prefira CSV ou Parquet
+    saida = io.BytesIO()
+    with pd.ExcelWriter(saida, engine="xlsxwriter") as writer:
+        pd.DataFrame(columns=COLUNAS_MASTER).to_excel(writer, index=False, sheet_name="Contas")
+        linha = 1
+        for lote in lotes:
+            lote.to_excel(writer, index=False, header=False, sheet_name="Contas", startrow=linha)
+            linha += len(lote)
+    return saida.getvalue()
+
+
+@cache.consulta
+def gerar_arquivo(formato: str, meses: tuple = (), usuario: str | None = None) -> bytes:
+    # Cacheado por (formato, meses, usuario, versão dos dados): clicar de novo sem
+    # ninguém ter gravado no banco devolve o mesmo arquivo sem reprocessar.
+    escritores = {"xlsx": _xlsx, "csv": _csv, "parquet": _parquet}
+    return escritores[formato](_lotes(tuple(meses), usuario))
@@ -0,0 +1,71 @@
+# calendario.py — dias úteis (seg–sex menos feriados) para projeções e gráficos PDU
+#
+# Único calendário dos dois apps (atlas e first-atlas): cada um acrescenta esta
+# pasta (comum/) ao sys.path antes de importar calendario.
+#
+# Os feriados vêm de feriados.csv (data,descricao), com vários anos; para um ano
+# novo basta acrescentar linhas ao arquivo. O np.busdaycalendar é montado uma vez
+# e refeito só quando o arquivo muda (mtime). Todas as funções aceitam uma data
+# ou um array/Series de datas e respondem de forma vetorizada (np.busday_*);
+# datas vazias (NaT/None) nunca são dia útil e contam 0 dias úteis.
+import calendar
+import functools
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ARQUIVO_FERIADOS = Path(__file__).resolve().parent / "feriados.csv"
+SEMANA_UTIL = "1111100"  # seg a sex
+
+
+@functools.lru_cache(maxsize=4)
+def _carregar(caminho: Path, mtime_ns: int) -> tuple:
+    tabela = pd.read_csv(caminho, parse_dates=["data"])
+    datas = tabela["data"].to_numpy(dtype="datetime64[D]")
+    return np.busdaycalendar(weekmask=SEMANA_UTIL, holidays=datas), frozenset(tabela["data"].dt.date)
+
+
+def calendario() -> np.busdaycalendar:
+    return _carregar(ARQUIVO_FERIADOS, ARQUIVO_FERIADOS.stat().st_mtime_ns)[0]
+
+
+def feriados() -> frozenset:
+    return _carregar(ARQUIVO_FERIADOS, ARQUIVO_FERIADOS.stat().st_mtime_ns)[1]
+
+
+def _dias(datas):
+    # date / Timestamp / str / array / Series -> datetime64[D] (escalar ou array)
+    if isinstance(datas, (pd.Series, pd.Index, list, tuple, np.ndarray)):
+        return pd.to_datetime(pd.Series(datas), errors="coerce").to_numpy(dtype="datetime64[D]")
+    return pd.Timestamp(datas).to_datetime64().astype("datetime64[D]") if pd.notna(datas) else np.datetime64("NaT", "D")
+
+
+def eh_dia_util(datas):
+    return np.is_busday(_dias(datas), busdaycal=calendario())
+
+
+def dias_uteis_entre(inicio, fim):
+    # dias úteis de inicio a fim, incluindo os dois extremos; 0 se fim < inicio ou se
+    # algum extremo é NaT (np.busday_count não aceita NaT, então eles viram uma data
+    # qualquer e o resultado é zerado depois)
+    inicio, fim = np.broadcast_arrays(_dias(inicio), _dias(fim))
+    validas = ~(np.isnat(inicio) | np.isnat(fim))
+    qualquer = np.datetime64("2000-01-01", "D")
+    total = np.busday_count(
+        np.where(validas, inicio, qualquer), np.where(validas, fim, qualquer) + np.timedelta64(1, "D"),
+        busdaycal=calendario(),
+    )
+    total = np.where(validas, np.maximum(total, 0), 0)
+    return total if total.ndim else total[()]
+
+
+def dias_uteis_no_mes(referencia: date) -> int:
+    _, ultimo_dia = calendar.monthrange(referencia.year, referencia.month)
+    return int(dias_uteis_entre(referencia.replace(day=1), referencia.replace(day=ultimo_dia)))
+
+
+def dias_uteis_passados_no_mes(referencia: date) -> int:
+    # do dia 1 até ontem
+    return int(dias_uteis_entre(referencia.replace(day=1), referencia - timedelta(days=1)))
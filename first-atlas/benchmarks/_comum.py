@@ -0,0 +1,50 @@
+# _comum.py — utilitários compartilhados pelos benchmarks (bench_*.py)
+#
+# Importado pelos scripts rodados da pasta first-atlas (python benchmarks/bench_x.py):
+# põe a pasta do app no sys.path para os benchmarks importarem os dashboards.
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dashboard_qualificador import TABELA_COLUNAS  # noqa: E402
+
+# STATUS como aparecem nas planilhas: vazios, espaços, minúsculas e nulos
+STATUS_AMOSTRA = [
+    "QUALIFICADO", "SALDO_MEDIO", "PROMESSA", "SEM CONTATO", "", "", " qualificado ",
+    "NOVO CRITÉRIO - PIX", "NOVO CRITÉRIO", "INVÁLIDO", "RECUSOU", None,
+]
+
+
+def balde_sintetico(n: int) -> pd.DataFrame:
+    # n linhas com todas as colunas de TABELA_COLUNAS: datas, valores, STATUS de
+    # STATUS_AMOSTRA e 40 consultores (mais linhas sem consultor)
+    rng = np.random.default_rng(42)
+    inicio = date(2026, 1, 1)
+    datas = np.array([inicio + timedelta(days=int(d)) for d in range(120)], dtype=object)
+    consultores = np.array([f"CONSULTOR {i}" for i in range(40)] + ["", None], dtype=object)
+    df = pd.DataFrame({col: pd.Series([f"{col} {i % 97}" for i in range(n)], dtype="string") for col in TABELA_COLUNAS})
+    df["STATUS"] = np.array(STATUS_AMOSTRA, dtype=object)[rng.integers(0, len(STATUS_AMOSTRA), n)]
+    df["CONSULTOR"] = consultores[rng.integers(0, len(consultores), n)]
+    df["CNPJ_CLIENTE"] = pd.Series(rng.integers(10**12, 10**13, n).astype(str), dtype="string")
+    for col in TABELA_COLUNAS:
+        if "DT_" in col or "DATA_" in col or col == "C6_PAY":
+            df[col] = datas[rng.integers(0, len(datas), n)]
+    for col in ["CASH_IN_ATUAL", "1º_MES_MOV", "2º_MES_MOV", "3º_MES_MOV"]:
+        df[col] = rng.random(n) * 20000
+    df["FL_QUALIFICADO"] = rng.integers(0, 2, n).astype(float)
+    return df
+
+
+def cronometrar(funcao, *args, repeticoes: int = 3):
+    # melhor tempo de `repeticoes` execuções + o resultado da última
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
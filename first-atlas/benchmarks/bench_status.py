@@ -0,0 +1,72 @@
+# bench_status.py — classificação de status do balde: apply linha a linha x classificar_status
+#
+# Uso (da pasta first-atlas):  python benchmarks/bench_status.py [linhas]
+# Gera um balde sintético (padrão 100 mil linhas), roda o caminho antigo
+# (normalizar_status via apply + uma máscara por KPI) e o novo (np.select uma vez
+# + value_counts), confere que as contagens batem e imprime os tempos.
+import sys
+
+import pandas as pd
+
+from _comum import balde_sintetico, cronometrar  # também põe a pasta do app no sys.path
+from dashboard_qualificador import (
+    STATUS_PROMESSA, STATUS_QUALIFICADO, STATUS_SALDO_MEDIO, classificar_status,
+)
+
+
+def caminho_antigo(df: pd.DataFrame, role: str):
+    df = df.copy()
+    df["STATUS"] = df["STATUS"].fillna("").str.strip().str.upper()
+    kpis = (
+        int((df["STATUS"] == STATUS_QUALIFICADO).sum()),
+        int((df["STATUS"] == STATUS_SALDO_MEDIO).sum()),
+        int((df["STATUS"] == STATUS_PROMESSA).sum()),
+    )
+    if role == "qualificador":
+        def normalizar_status(valor):
+            v = str(valor).strip().upper()
+            if "NOVO CRITÉRIO" in v:
+                return "NOVO CRITÉRIO"
+            elif v == "":
+                return "SEM CONTATO ESSE MÊS"
+            return v
+        grupos = df["STATUS"].apply(normalizar_status)
+    else:
+        def normalizar_status(row):
+            status_raw = row.get("STATUS", "")
+            consultor_raw = row.get("CONSULTOR", "")
+            v = str(status_raw).strip().upper()
+            consultor = str(consultor_raw).strip()
+            if "NOVO CRITÉRIO" in v or "INVÁLIDO" in v:
+                return "INVÁLIDO"
+            if v == "SEM CONTATO":
+                return "ORGÂNICA"
+            if v == "" or pd.isna(status_raw):
+                if consultor != "" and not pd.isna(consultor_raw):
+                    return "SEM CONTATO ESSE MÊS"
+                return "SEM QUALIFICADOR"
+            return v
+        grupos = df.apply(normalizar_status, axis=1)
+    return kpis, grupos.value_counts()
+
+
+def caminho_novo(df: pd.DataFrame, role: str):
+    status = df["STATUS"].fillna("").astype(str).str.strip().str.upper()
+    grupos = pd.Series(classificar_status(status, df["CONSULTOR"], role))
+    contagem = status.astype("category").value_counts()
+    kpis = tuple(int(contagem.get(s, 0)) for s in (STATUS_QUALIFICADO, STATUS_SALDO_MEDIO, STATUS_PROMESSA))
+    contagem_grupos = grupos.value_counts()
+    return kpis, contagem_grupos[contagem_grupos > 0]
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    # só as colunas usadas: o apply por linha do caminho antigo cresce com a largura do frame
+    df = balde_sintetico(n)[["STATUS", "CONSULTOR"]]
+    for role in ("qualificador", "master"):
+        t_antigo, (kpis_antigo, grupos_antigo) = cronometrar(caminho_antigo, df, role)
+        t_novo, (kpis_novo, grupos_novo) = cronometrar(caminho_novo, df, role)
+        assert kpis_antigo == kpis_novo, (kpis_antigo, kpis_novo)
+        assert grupos_antigo.sort_index().to_dict() == grupos_novo.sort_index().to_dict()
+        print(f"{role:>12}: apply {t_antigo * 1000:8.1f} ms | vetorizado {t_novo * 1000:7.1f} ms"
+              f" | {t_antigo / t_novo:5.1f}x  ({n} linhas)")
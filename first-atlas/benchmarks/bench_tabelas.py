@@ -0,0 +1,46 @@
+# bench_tabelas.py — exibição das tabelas do balde: Styler x column_config
+#
+# Uso (da pasta first-atlas):  python benchmarks/bench_tabelas.py [linhas ...]
+# Mede, para baldes sintéticos de vários tamanhos, o trabalho que o st.dataframe
+# faz no servidor em cada caminho:
+#   Styler:        formatar_tabela + marshall_styler (CSS e valores exibidos por célula) + Arrow
+#   column_config: preparar_tabela + config_colunas + Arrow (formatação fica no navegador)
+import sys
+
+import pandas as pd
+from streamlit import dataframe_util
+from streamlit.elements.lib.pandas_styler_utils import marshall_styler
+from streamlit.proto.ArrowData_pb2 import ArrowData
+
+from _comum import balde_sintetico, cronometrar  # também põe a pasta do app no sys.path
+from dashboard_qualificador import (
+    LIMITE_STYLER, TABELA_COLUNAS, config_colunas, formatar_tabela, preparar_tabela, selecionar_colunas_padrao,
+)
+
+
+def caminho_styler(df: pd.DataFrame) -> int:
+    styler = formatar_tabela(df, "#FFFFFF")
+    proto = ArrowData()
+    marshall_styler(proto, styler, default_uuid="bench")
+    dados = dataframe_util.convert_anything_to_pandas_df(styler, ensure_copy=False)
+    return len(dataframe_util.convert_pandas_df_to_arrow_bytes(dados)) + proto.ByteSize()
+
+
+def caminho_column_config(df: pd.DataFrame) -> int:
+    df = preparar_tabela(df)
+    config_colunas(df)
+    return len(dataframe_util.convert_pandas_df_to_arrow_bytes(df))
+
+
+if __name__ == "__main__":
+    tamanhos = [int(n) for n in sys.argv[1:]] or [LIMITE_STYLER, 5_000, 50_000]
+    # acima de 262144 células o Styler nem chega a renderizar (erro no st.dataframe);
+    # o limite é aumentado só aqui, para dar para medir
+    pd.set_option("styler.render.max_elements", max(tamanhos) * len(TABELA_COLUNAS))
+    for n in tamanhos:
+        df = selecionar_colunas_padrao(balde_sintetico(n))
+        t_styler, bytes_styler = cronometrar(caminho_styler, df)
+        t_config, bytes_config = cronometrar(caminho_column_config, df)
+        print(f"{n:>7} linhas: Styler {t_styler * 1000:9.1f} ms ({bytes_styler / 1e6:6.1f} MB)"
+              f" | column_config {t_config * 1000:7.1f} ms ({bytes_config / 1e6:5.1f} MB)"
+              f" | {t_styler / t_config:5.1f}x")
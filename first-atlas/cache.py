@@ -0,0 +1,150 @@
+# cache.py — cache compartilhado dos conjuntos de dados dos dashboards
+#
+# Substitui o @st.cache_data nos carregamentos de planilha: o st.cache_data não tem
+# limite de memória e serializa/copia o DataFrame para cada sessão. Aqui cada
+# conjunto fica uma única vez na memória do processo, num LRU limitado em bytes,
+# e cada chamador recebe uma visão rasa (copy-on-write do pandas 3): alterar
+# colunas/valores no dashboard gera cópia só do que foi alterado, sem mexer no que
+# está em cache. Sem copy-on-write (pandas < 3) a visão é uma cópia completa.
+import functools
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+COPY_ON_WRITE = int(pd.__version__.split(".")[0]) >= 3
+
+MAX_BYTES = 512 * 1024 * 1024  # 512 MB
+# entradas mais velhas que isto são descartadas (as chaves dos dashboards já levam a
+# versão do arquivo; o TTL libera as versões antigas que ninguém pede mais)
+TTL_PADRAO_S = 600
+
+
+def _tamanho(valor) -> int:
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True).sum())
+    if isinstance(valor, pd.Series):
+        return int(valor.memory_usage(deep=True))
+    if isinstance(valor, np.ndarray):
+        return int(valor.nbytes)
+    if isinstance(valor, (tuple, list)):
+        return sys.getsizeof(valor) + sum(_tamanho(v) for v in valor)
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(sys.getsizeof(k) + _tamanho(v) for k, v in valor.items())
+    return sys.getsizeof(valor)
+
+
+def _visao(valor):
+    # (frame, índice) -> (visão do frame, índice); índices são só leitura por convenção.
+    # A cópia rasa só isola a entrada do cache com copy-on-write; sem ele, cópia completa
+    if isinstance(valor, tuple):
+        return tuple(_visao(v) for v in valor)
+    return valor.copy(deep=not COPY_ON_WRITE) if isinstance(valor, (pd.DataFrame, pd.Series)) else valor
+
+
+class CacheDados:
+    # LRU limitado por bytes, compartilhado entre sessões. Duas sessões pedindo a
+    # mesma chave ao mesmo tempo carregam uma vez só: a segunda espera a primeira.
+
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entradas = OrderedDict()  # chave -> (valor, tamanho, carregado_em)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._carregando = {}  # chave -> Lock do carregamento em andamento
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _descartar(self, chave) -> None:
+        _, tamanho, _ = self._entradas.pop(chave)
+        self._bytes -= tamanho
+
+    def _buscar(self, chave, ttl: float | None):
+        entrada = self._entradas.get(chave)
+        if entrada is None:
+            return None
+        if ttl is not None and time.monotonic() - entrada[2] > ttl:
+            self._descartar(chave)
+            return None
+        self._entradas.move_to_end(chave)
+        return entrada
+
+    def obter(self, chave, carregar, ttl: float | None = None):
+        with self._lock:
+            entrada = self._buscar(chave, ttl)
+            if entrada is not None:
+                self.hits += 1
+                return _visao(entrada[0])
+            trava = self._carregando.setdefault(chave, threading.Lock())
+
+        with trava:
+            try:
+                with self._lock:
+                    # outra sessão pode ter carregado enquanto esperávamos a trava
+                    entrada = self._buscar(chave, ttl)
+                    if entrada is not None:
+                        self.hits += 1
+                        return _visao(entrada[0])
+                    self.misses += 1
+                valor = carregar()
+                tamanho = _tamanho(valor)
+
+                with self._lock:
+                    if tamanho <= self.max_bytes:
+                        if chave in self._entradas:
+                            self._descartar(chave)
+                        self._entradas[chave] = (valor, tamanho, time.monotonic())
+                        self._bytes += tamanho
+                        while self._bytes > self.max_bytes:
+                            self._descartar(next(iter(self._entradas)))
+                            self.evictions += 1
+            finally:
+                # só depois de a entrada estar guardada: quem chegar a partir daqui a
+                # encontra, e quem esperava na trava também
+                with self._lock:
+                    self._carregando.pop(chave, None)
+        return _visao(valor)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "chaves": [str(k) for k in self._entradas],
+            }
+
+
+_cache = CacheDados()
+
+
+def dataset(func=None, *, ttl: float | None = TTL_PADRAO_S):
+    # Decorator: memoiza por (função, argumentos). Uso: @cache.dataset ou @cache.dataset(ttl=60)
+    if func is None:
+        return functools.partial(dataset, ttl=ttl)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        chave = (func.__qualname__, args, tuple(sorted(kwargs.items())))
+        return _cache.obter(chave, lambda: func(*args, **kwargs), ttl)
+    return wrapper
+
+
+def estatisticas() -> dict:
+    return _cache.estatisticas()
+
+
+def limpar() -> None:
+    _cache.limpar()
@@ -7,7 +7,22 @@ from datetime import date, datetime, timedelta
 import calendar
 import numpy as np
 import plotly.express as px
+from concurrent.futures import ThreadPoolExecutor
 import dashboard_qualificador 
+import cache
+import sys
+from pathlib import Path
+# calendario.py e feriados.csv ficam em comum/, compartilhados com o atlas
+PASTA_COMUM = str(Path(__file__).resolve().parent.parent / "comum")
+if PASTA_COMUM not in sys.path:
+    sys.path.append(PASTA_COMUM)
+import calendario
+import exportacao
+import particoes
+import ingestao
+import fontes
+import manifesto
+import planilhas
 
 # ---------- Estilo ----------
 st.set_page_config(page_title="Dashboard de Produção", layout="wide")
@@ -26,65 +41,117 @@ st.sidebar.markdown(
     unsafe_allow_html=True
 )
 
-@st.cache_data
 def carregar_dados(mes_selecionado):
-    EXCEL_URL_BASE = "https://github.com/Augusto05/atlas/raw/refs/heads/main/first-atlas/"
-    EXCEL_URL = f"{EXCEL_URL_BASE}producao_{mes_selecionado}.xlsx"
-    return pd.read_excel(EXCEL_URL, dtype={"CNPJ": str})
+    # arquivo vem da fonte configurada (fontes.py); usa o producao.db se ele tem a
+    # versão atual desse arquivo (python ingestao.py), senão a cópia Parquet (planilhas.py),
+    # com os mesmos tipos do banco (ingestao.tipar)
+    caminho = fontes.caminho(f"producao_{mes_selecionado}.xlsx")
+    df = ingestao.ler_arquivo(caminho)
+    if df is None:
+        df = ingestao.tipar(planilhas.ler_planilha(caminho, dtype={"CNPJ": str}), "producao")
+    return df
+
+def versao_producao(mes_selecionado):
+    # (tamanho, mtime_ns) do arquivo do mês na fonte: entra nas chaves de cache, e
+    # um arquivo republicado gera chave nova
+    info = fontes.caminho(f"producao_{mes_selecionado}.xlsx").stat()
+    return info.st_size, info.st_mtime_ns
+
+# STATUS_ABERTURA (já em maiúsculas) -> status usado nas métricas; o resto é "Outras"
+STATUS_PADRONIZADOS = {
+    "APROVADA": "Aprovada",
+    "ANÁLISE": "Analise",
+    "PENDÊNCIA DOC": "Analise",
+    "AINDA NAO INICIOU A ABERTURA DE CONTA": "Analise",
+}
+
+def _categoria_texto(serie):
+    # texto sem espaços nas pontas, como categoria (comparações viram comparação de códigos)
+    return serie.astype("string").str.strip().astype("category")
+
+def carregar_producao_normalizada(mes_selecionado):
+    # Preparo feito uma vez por versão do arquivo do mês (dentro de carregar_mes_particionado,
+    # e não a cada rerun): colunas em maiúsculas, DATA_BASE como data, MES, e
+    # STATUS_ABERTURA / STATUS_PADRONIZADO / CONSULTOR / ORIGEM como categorias.
+    df = carregar_dados(mes_selecionado)
+    df.columns = df.columns.str.strip().str.upper()
+    df["DATA_BASE"] = pd.to_datetime(df["DATA_BASE"], errors="coerce")
+    df["MES"] = df["DATA_BASE"].dt.to_period("M").astype(str)
+
+    status = df["STATUS_ABERTURA"].astype("string").str.strip().str.upper()
+    df["STATUS_ABERTURA"] = status.astype("category")
+    df["STATUS_PADRONIZADO"] = pd.Categorical(
+        status.map(STATUS_PADRONIZADOS).fillna("Outras"), categories=["Aprovada", "Analise", "Outras"]
+    )
+    for col in ("CONSULTOR", "ORIGEM"):
+        if col in df.columns:
+            df[col] = _categoria_texto(df[col])
+    return df
+
+@cache.dataset
+def carregar_mes_particionado(mes_selecionado, versao):
+    # (frame do mês, índice de linhas por consultor) na mesma entrada do cache, a única
+    # por mês: cada consultor pega as próprias linhas sem comparar a coluna inteira.
+    # versao (versao_producao) só entra na chave.
+    df = carregar_producao_normalizada(mes_selecionado)
+    return df, particoes.indexar_por_consultor(df)
+
+def carregar_mes(mes_selecionado):
+    # com a versão atual do arquivo na chave, planilha republicada é relida já no
+    # próximo rerun (sem esperar o TTL); a entrada antiga sai pelo TTL/LRU
+    return carregar_mes_particionado(mes_selecionado, versao_producao(mes_selecionado))
+
+# meses lidos ao mesmo tempo no modo de comparação (leitura de Parquet/SQLite libera o GIL)
+MAX_LEITURAS_PARALELAS = 4
+
+def carregar_periodo(meses, consultor=None):
+    # Sem cache próprio: cada mês já fica no cache (carregar_mes, o mesmo
+    # da visão mensal), e guardar também o concat manteria cada mês duas vezes na memória.
+    # Com consultor, cada mês é recortado pelo índice de consultores antes do concat; e
+    # cada arquivo contribui só com as linhas do próprio mês (MES), como na visão mensal.
+    with ThreadPoolExecutor(max_workers=min(MAX_LEITURAS_PARALELAS, len(meses))) as pool:
+        particionados = list(pool.map(carregar_mes, meses))
+    frames = []
+    for mes, (df, indice) in zip(meses, particionados):
+        if consultor is not None:
+            df = particoes.fatia(df, indice, consultor)
+        frames.append(df[df["MES"] == mes])
+    df = pd.concat(frames, ignore_index=True)
+    # concat de categorias diferentes entre meses vira texto; volta a ser categoria
+    for col in ("STATUS_ABERTURA", "CONSULTOR", "ORIGEM"):
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
+
+def meses_do_periodo(periodo, mes_selecionado, meses_disponiveis):
+    ano = mes_selecionado[:4]
+    if periodo == "Ano até agora":
+        return tuple(m for m in meses_disponiveis if m[:4] == ano and m <= mes_selecionado)
+    if periodo == "Trimestre":
+        trimestre = (int(mes_selecionado[5:7]) - 1) // 3
+        return tuple(
+            m for m in meses_disponiveis
+            if m[:4] == ano and (int(m[5:7]) - 1) // 3 == trimestre and m <= mes_selecionado
+        )
+    return tuple(meses_disponiveis)
+
+@st.cache_data(show_spinner=False, max_entries=8, ttl=cache.TTL_PADRAO_S)
+def gerar_exportacao(formato, meses, versoes):
+    # chave = formato + meses + versões dos arquivos (versao_producao de cada mês);
+    # cada mês sai do cache de datasets e é escrito em lotes (exportacao.py)
+    frames = []
+    for mes in meses:
+        df, _ = carregar_mes(mes)
+        frames.append(df[df["MES"] == mes])
+    return exportacao.gerar_arquivo(formato, frames)
 
 def dashboard_prospeccao(config, username, name, user_role):
         # ---------- Lista de meses disponíveis ----------
-        meses_disponiveis = [
-            "2025-10",
-            "2025-11",
-        ]
-
-        # ---------- Lista de feriados ----------
-        def _to_date_obj(dt):
-            if pd.isna(dt):
-                return None
-            if isinstance(dt, date) and not isinstance(dt, datetime):
-                return dt
-            if isinstance(dt, datetime):
-                return dt.date()
-            if isinstance(dt, pd.Timestamp):
-                return dt.to_pydatetime().date()
-            try:
-                return pd.to_datetime(dt).date()
-            except Exception:
-                return None
-
-        # Função principal para cálculo de dias úteis incluindo o último dia
-        def dias_uteis_inclusive(start_dt, end_dt, feriados=None):
-            fer = feriados or []
-            s = _to_date_obj(start_dt)
-            e = _to_date_obj(end_dt)
-            if s is None or e is None or s > e:
-                return 0
-            start_np = np.datetime64(s)
-            end_next_np = np.datetime64(e) + np.timedelta64(1, "D")
-            total = int(np.busday_count(start_np, end_next_np))
-            for f in fer:
-                f_date = _to_date_obj(f)
-                if f_date and s <= f_date <= e and np.is_busday(np.datetime64(f_date)):
-                    total -= 1
-            return max(total, 0)
-
-        # Feriados fixos válidos para São Paulo
-        FERIADOS = [
-            date(2026, 1, 1),   # Confraternização Universal
-            date(2026, 1, 25),  # Aniversário de SP
-            date(2026, 2, 17),  # Carnaval
-            date(2026, 4, 21),  # Tiradentes
-            date(2026, 5, 1),   # Dia do Trabalho
-            date(2026, 7, 9),   # Revolução Constitucionalista
-            date(2026, 9, 7),   # Independência
-            date(2026, 10, 12), # Nossa Senhora Aparecida
-            date(2026, 11, 2),  # Finados
-            date(2026, 11, 15), # Proclamação da República
-            date(2025, 11, 20), # Consciência Negra
-            date(2025, 12, 25), # Natal
-        ]
+        # vem dos arquivos producao_AAAA-MM.xlsx presentes na fonte (manifesto.py)
+        meses_disponiveis = manifesto.meses("producao")
+        if not meses_disponiveis:
+            st.warning("Nenhuma planilha de produção encontrada.")
+            st.stop()
 
         mes_atual = datetime.today().strftime("%Y-%m")
         mes_selecionado = st.sidebar.selectbox(
@@ -93,33 +160,15 @@ def dashboard_prospeccao(config, username, name, user_role):
             index=meses_disponiveis.index(mes_atual) if mes_atual in meses_disponiveis else 0
         )
         mes_eh_atual = mes_selecionado == mes_atual
-        df = carregar_dados(mes_selecionado)
-
-        df.columns = df.columns.str.strip().str.upper()
-        df["DATA_BASE"] = pd.to_datetime(df["DATA_BASE"], errors="coerce")
-        df["MES"] = df["DATA_BASE"].dt.to_period("M").astype(str)
+        df, indice_consultores = carregar_mes(mes_selecionado)
 
         # ---------- Filtro por usuário e mês ----------
         if user_role == "master":
             df_mes = df[df["MES"] == mes_selecionado].copy()
         else:
-            df_user = df[df["CONSULTOR"].str.strip().str.lower() == name.strip().lower()].copy()
+            df_user = particoes.fatia(df, indice_consultores, name)
             df_mes = df_user[df_user["MES"] == mes_selecionado]
 
-        def normalizar_status(valor):
-            v = str(valor).strip().upper()
-            if v == "APROVADA":
-                return "Aprovada"
-            elif v in ["ANÁLISE", "PENDÊNCIA DOC", "AINDA NAO INICIOU A ABERTURA DE CONTA"]:
-                return "Analise"
-            elif v in ["CARIMBADA", "REPROVADA", "INVÁLIDA"]:
-                return "Outras"
-            else:
-                return "Outras"
-
-        df_mes["STATUS_PADRONIZADO"] = df_mes["STATUS_ABERTURA"].apply(normalizar_status)
-
-
         # ---------- Sidebar: meta e ranking ----------
         st.sidebar.markdown("## 📊 Projeções e Comissão")
 
@@ -207,28 +256,17 @@ def dashboard_prospeccao(config, username, name, user_role):
                 "bonus": bonus
             }
 
-        def dias_uteis_inclusive(start_dt, end_dt, feriados=None):
-            fer = feriados or []
-            s = pd.to_datetime(start_dt).date()
-            e = pd.to_datetime(end_dt).date()
-            total = np.busday_count(s, e + timedelta(days=1))
-            for f in fer:
-                f = pd.to_datetime(f).date()
-                if s <= f <= e and np.is_busday(f):
-                    total -= 1
-            return max(total, 0)
-
         # ---------- Métricas ----------
         total_aprovadas = df_mes[df_mes["STATUS_PADRONIZADO"] == "Aprovada"].shape[0]
         if user_role == "master":
-            analise_input = df_mes[df_mes["STATUS_ABERTURA"].str.upper().str.strip() == "ANÁLISE"].shape[0]
+            analise_input = df_mes[df_mes["STATUS_ABERTURA"] == "ANÁLISE"].shape[0]
         else:
             analise_input = df_mes[df_mes["STATUS_PADRONIZADO"] == "Analise"].shape[0]
 
-        nao_iniciadas = df_mes[df_mes["STATUS_ABERTURA"].str.upper().str.strip() == "AINDA NAO INICIOU A ABERTURA DE CONTA"].shape[0]
-        pendencias_doc = df_mes[df_mes["STATUS_ABERTURA"].str.upper().str.strip() == "PENDÊNCIA DOC"].shape[0]
+        nao_iniciadas = df_mes[df_mes["STATUS_ABERTURA"] == "AINDA NAO INICIOU A ABERTURA DE CONTA"].shape[0]
+        pendencias_doc = df_mes[df_mes["STATUS_ABERTURA"] == "PENDÊNCIA DOC"].shape[0]
         contas_invalidas = df_mes[
-            df_mes["STATUS_ABERTURA"].str.upper().str.strip().isin(["INVÁLIDA", "REPROVADA", "AINDA NAO INICIOU A ABERTURA DE CONTA"])
+            df_mes["STATUS_ABERTURA"].isin(["INVÁLIDA", "REPROVADA", "AINDA NAO INICIOU A ABERTURA DE CONTA"])
         ].shape[0]
 
         avisos = []
@@ -262,9 +300,9 @@ def dashboard_prospeccao(config, username, name, user_role):
         hoje_date = date.today() - timedelta(days=1)
 
 
-        # Cálculo dos dias úteis
-        dias_uteis_total = dias_uteis_inclusive(inicio_mes, fim_mes, FERIADOS)
-        dias_uteis_passados = dias_uteis_inclusive(inicio_mes, min(hoje_date, fim_mes), FERIADOS)
+        # Cálculo dos dias úteis (calendario.py, feriados de feriados.csv)
+        dias_uteis_total = int(calendario.dias_uteis_entre(inicio_mes, fim_mes))
+        dias_uteis_passados = int(calendario.dias_uteis_entre(inicio_mes, min(hoje_date, fim_mes)))
         dias_uteis_restantes = max(dias_uteis_total - dias_uteis_passados, 0)
         elapsed_business = dias_uteis_passados if dias_uteis_passados > 0 else 1
 
@@ -317,12 +355,12 @@ def dashboard_prospeccao(config, username, name, user_role):
 
             # Filtra apenas contas com status APROVADA ou ANÁLISE
             df_abertas = df_mes[
-                df_mes["STATUS_ABERTURA"].str.upper().str.strip().isin(["APROVADA"])
+                df_mes["STATUS_ABERTURA"] == "APROVADA"
             ]
 
             # Agrupa por consultor e conta
             ranking_abertas = (
-                df_abertas.groupby("CONSULTOR")
+                df_abertas.groupby("CONSULTOR", observed=True)
                 .size()
                 .reset_index(name="Contas Abertas")
                 .sort_values(by="Contas Abertas", ascending=False)
@@ -343,13 +381,9 @@ def dashboard_prospeccao(config, username, name, user_role):
         
         st.subheader("Minhas Contas" if user_role != "master" else "Todas as Contas")
         if user_role == "master":
-            df_exibicao = df_mes.copy()
+            df_exibicao = df_mes
         else:
-            df_exibicao = df_mes[df_mes["CONSULTOR"] == name].copy()
-
-    # Formatação da coluna de data
-        df_exibicao["DATA_BASE"] = pd.to_datetime(df_exibicao["DATA_BASE"], errors="coerce")
-        df_exibicao["DATA_BASE"] = df_exibicao["DATA_BASE"].dt.strftime("%d/%m/%Y")
+            df_exibicao = df_mes[df_mes["CONSULTOR"] == name]
 
         # Selecionar colunas para exibição
         if user_role == "master":
@@ -362,18 +396,12 @@ def dashboard_prospeccao(config, username, name, user_role):
         df_display.reset_index(drop=True, inplace=True)
         df_display.index = df_display.index + 1
 
-        # Exibir tabela
+        # Exibir tabela: data e larguras via column_config (sem Styler; a tabela do master tem o mês inteiro)
+        config_colunas = {"DATA_BASE": st.column_config.DateColumn("DATA_BASE", format="DD/MM/YYYY")}
         if user_role == "master":
-            estilo_colunas = {
-                "NOME_CLIENTE": [{"selector": "td", "props": [("max-width", "90px"), ("white-space", "nowrap"), ("overflow", "hidden"), ("text-overflow", "ellipsis")]}],
-                "CONSULTOR": [{"selector": "td", "props": [("max-width", "120px"), ("white-space", "nowrap"), ("overflow", "hidden"), ("text-overflow", "ellipsis")]}],  
-            }
-            st.dataframe(
-                df_display.style.set_table_styles(estilo_colunas, overwrite=False).hide(axis="index"),
-                use_container_width=True
-            )
-        else:
-            st.dataframe(df_display.style.hide(axis="index"), use_container_width=True)
+            config_colunas["NOME_CLIENTE"] = st.column_config.TextColumn("NOME_CLIENTE", width="small")
+            config_colunas["CONSULTOR"] = st.column_config.TextColumn("CONSULTOR", width="medium")
+        st.dataframe(df_display, column_config=config_colunas, hide_index=True, use_container_width=True)
 
 
 
@@ -391,14 +419,20 @@ def dashboard_prospeccao(config, username, name, user_role):
             df_pendencias_display.index = df_pendencias_display.index + 1
 
             # Exibir tabela
-            st.dataframe(df_pendencias_display.style.hide(axis="index"), use_container_width=True)
+            st.dataframe(
+                df_pendencias_display,
+                column_config={"DATA_BASE": config_colunas["DATA_BASE"]},
+                hide_index=True,
+                use_container_width=True
+            )
 
 
         st.markdown("---")
 
         # ---------- Gráficos ----------
         st.markdown("### Análise rápida")
-        origem_counts = df_mes["ORIGEM"].fillna("Desconhecida").value_counts()
+        # ORIGEM é categoria: value_counts contaria com 0 as origens de outros consultores
+        origem_counts = df_mes["ORIGEM"].astype("string").fillna("Desconhecida").value_counts()
         fig_origin = px.pie(
             names=origem_counts.index,
             values=origem_counts.values,
@@ -436,15 +470,14 @@ def dashboard_prospeccao(config, username, name, user_role):
 
         # ---------- Gráfico PDU -----------
         df_aprovadas = df_mes[df_mes["STATUS_PADRONIZADO"] == "Aprovada"]
-        df_aprovadas["DIA_UTIL"] = df_aprovadas["DATA_BASE"].dt.strftime("%d/%m")
         if user_role != "master":
             df_aprovadas = df_aprovadas[df_aprovadas["CONSULTOR"] == name]
-        pdu_diario = (
-            df_aprovadas.groupby("DIA_UTIL")
-            .size()
-            .reset_index(name="Contas Aprovadas")
-            .sort_values("DIA_UTIL")
-        )
+        # aprovações pela data em que aconteceram; fins de semana e feriados
+        # (calendario.py) ficam fora do PDU, como no dashboard de qualificação
+        dias = df_aprovadas["DATA_BASE"].dt.normalize()
+        dias = dias[calendario.eh_dia_util(dias)]
+        pdu_diario = dias.value_counts().sort_index().rename_axis("DIA_UTIL").reset_index(name="Contas Aprovadas")
+        pdu_diario["DIA_UTIL"] = pdu_diario["DIA_UTIL"].dt.strftime("%d/%m")
         st.subheader("PDU – Contas Aprovadas por Dia Útil")
 
         fig_pdu = px.bar(
@@ -504,24 +537,86 @@ def dashboard_prospeccao(config, username, name, user_role):
         for r in recs:
             st.write("- " + r)
 
-        # ---------- Exportação opcional ----------
-        import io
-        if user_role == "master" and not df_mes.empty:
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                df_mes.to_excel(writer, index=False, sheet_name='Contas')
-            output.seek(0)
-            st.download_button(
-                label="📥 Exportar minhas contas (Excel)",
-                data=output,
-                file_name="minhas_contas.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        # ---------- Evolução entre meses (carregados só quando pedido) ----------
+        st.markdown("---")
+        if st.checkbox("📈 Comparar meses", key="comparar_meses"):
+            periodo = st.radio(
+                "Período", ["Ano até agora", "Trimestre", "Todos os meses"], horizontal=True, key="periodo_comparacao"
             )
+            meses_periodo = meses_do_periodo(periodo, mes_selecionado, meses_disponiveis)
+            with st.spinner(f"Carregando {len(meses_periodo)} meses..."):
+                df_periodo = carregar_periodo(meses_periodo, None if user_role == "master" else name)
+            aprovadas_periodo = df_periodo[df_periodo["STATUS_PADRONIZADO"] == "Aprovada"]
+
+            p1, p2, p3 = st.columns(3)
+            p1.metric(f"Aprovadas ({meses_periodo[0]} a {meses_periodo[-1]})", len(aprovadas_periodo))
+            p2.metric("Média por mês", f"{len(aprovadas_periodo) / len(meses_periodo):.0f}")
+            p3.metric(
+                "Conversão no período",
+                f"{len(aprovadas_periodo) / len(df_periodo) * 100:.1f}%" if len(df_periodo) else "-"
+            )
+
+            if user_role == "master":
+                # tendência dos 10 consultores com mais aprovadas no período
+                top_consultores = aprovadas_periodo["CONSULTOR"].value_counts().head(10).index
+                tendencia = (
+                    aprovadas_periodo[aprovadas_periodo["CONSULTOR"].isin(top_consultores)]
+                    .groupby(["MES", "CONSULTOR"], observed=True)
+                    .size()
+                    .reset_index(name="Contas Aprovadas")
+                )
+                fig_tendencia = px.line(
+                    tendencia, x="MES", y="Contas Aprovadas", color="CONSULTOR", markers=True,
+                    labels={"MES": "Mês", "CONSULTOR": "Consultor"},
+                    title="Aprovadas por mês — 10 maiores do período"
+                )
+            else:
+                tendencia = (
+                    aprovadas_periodo.groupby("MES").size()
+                    .reindex(list(meses_periodo), fill_value=0)
+                    .rename_axis("MES").reset_index(name="Contas Aprovadas")
+                )
+                fig_tendencia = px.line(
+                    tendencia, x="MES", y="Contas Aprovadas", markers=True,
+                    labels={"MES": "Mês"}, title="Minhas aprovadas por mês",
+                    color_discrete_sequence=["#2b8cbe"]
+                )
+            fig_tendencia.update_xaxes(type="category")
+            st.plotly_chart(fig_tendencia, use_container_width=True)
+
+        # ---------- Exportação opcional (gerada só quando pedida) ----------
+        if user_role == "master":
+            with st.expander("📥 Exportar contas", expanded=False):
+                e1, e2 = st.columns([1, 2])
+                formato_export = e1.selectbox(
+                    "Formato", exportacao.formatos_disponiveis(), format_func=exportacao.rotulo, key="export_formato"
+                )
+                meses_export = e2.multiselect(
+                    "Meses (vazio = todos)", meses_disponiveis, default=[mes_selecionado], key="export_meses"
+                )
+                if st.button("Gerar arquivo", key="export_gerar"):
+                    meses_pedido = tuple(sorted(meses_export)) or tuple(meses_disponiveis)
+                    st.session_state["export_pedido"] = (formato_export, meses_pedido)
+
+                pedido = st.session_state.get("export_pedido")
+                if pedido:
+                    with st.spinner("Gerando arquivo..."):
+                        conteudo = gerar_exportacao(*pedido, tuple(map(versao_producao, pedido[1])))
+                    st.download_button(
+                        label=f"📥 Baixar {exportacao.rotulo(pedido[0])}",
+                        data=conteudo,
+                        file_name=exportacao.nome_arquivo(*pedido),
+                        mime=exportacao.mime(pedido[0]),
+                        on_click=lambda: st.session_state.pop("export_pedido", None)
+                    )
 
 # ---------- Autenticação ----------
 with open('config.yaml') as file:
     config = yaml.load(file, Loader=SafeLoader)
 
+# origem das planilhas (pasta local por padrão; ver fontes.py)
+fontes.configurar(config.get("fonte_dados"))
+
 authenticator = stauth.Authenticate(
     config['credentials'],
     config['cookie']['name'],
@@ -566,6 +661,9 @@ elif authentication_status:
         else:
             dashboard_prospeccao(config, username, name, user_role)
 
+        with st.sidebar.expander("Cache de dados", expanded=False):
+            st.json(cache.estatisticas())
+
     else:
         dashboard_prospeccao(config, username, name, user_role)
 
@@ -3,9 +3,21 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from datetime import date, datetime
-import calendar
 import plotly.express as px
 from pandas.io.formats.style import Styler
+import cache
+import sys
+from pathlib import Path
+# calendario.py e feriados.csv ficam em comum/, compartilhados com o atlas
+PASTA_COMUM = str(Path(__file__).resolve().parent.parent / "comum")
+if PASTA_COMUM not in sys.path:
+    sys.path.append(PASTA_COMUM)
+import calendario
+import fontes
+import ingestao
+import particoes
+import manifesto
+import planilhas
 
 # ---------------------------
 # Configurações fixas
@@ -17,37 +29,40 @@ TABELA_COLUNAS = [
     "FL_QUALIFICADO", "CRITERIOS_MES_ATUAL", "1º_MES_MOV", "2º_MES_MOV", "3º_MES_MOV"
 ]
 
+# colunas usadas pelos KPIs e gráficos além das da tabela
+COLUNAS_KPI = ["DT_QUALIFICADA", "DATA_PREVISTA", "PREVISAO", "PERFIL M"]
+
+# tipo de cada coluna lida do balde (planilhas.ler_xlsx_colunas); as demais são texto
+TIPOS_COLUNAS = {
+    "DT_1º_CTT": "data", "DT_ULTIMO_CTT": "data", "DT_CONTA_CRIADA": "data", "DATA_PROMESSA": "data",
+    "DT_QUALIFICADA": "data", "DATA_PREVISTA": "data",
+    "CASH_IN_ATUAL": "real", "FL_QUALIFICADO": "real", "PREVISAO": "real",
+    "1º_MES_MOV": "real", "2º_MES_MOV": "real", "3º_MES_MOV": "real",
+}
+COLUNAS_LEITURA = {col: TIPOS_COLUNAS.get(col, "texto") for col in TABELA_COLUNAS + COLUNAS_KPI}
+
 STATUS_QUALIFICADO = "QUALIFICADO"
 STATUS_SALDO_MEDIO = "SALDO_MEDIO"
 STATUS_PROMESSA = "PROMESSA"
 
-# Feriados nacionais fixos (exemplo Brasil 2025)
-FERIADOS_FIXOS = {
-    date(2026, 1, 1),   # Confraternização Universal
-    date(2026, 1, 25),  # Aniversário de SP
-    date(2026, 2, 17),  # Carnaval
-    date(2026, 4, 21),  # Tiradentes
-    date(2026, 5, 1),   # Dia do Trabalho
-    date(2026, 7, 9),   # Revolução Constitucionalista
-    date(2026, 9, 7),   # Independência
-    date(2026, 10, 12), # Nossa Senhora Aparecida
-    date(2026, 11, 2),  # Finados
-    date(2026, 11, 15), # Proclamação da República
-    date(2025, 11, 20), # Consciência Negra
-    date(2025, 12, 25), # Natal
-}
+CAMPOS_VALORES = ["CASH_IN_ATUAL", "1º_MES_MOV", "2º_MES_MOV", "3º_MES_MOV"]
+# Acima disso as tabelas são exibidas sem Styler: gerar o estilo célula a célula
+# domina o tempo da página em baldes grandes (benchmarks/bench_tabelas.py)
+LIMITE_STYLER = 200
 
 # ---------------------------
 # Helpers
 # ---------------------------
 
-@st.cache_data(show_spinner=False)
-def carregar_planilha(url_arquivo: str) -> pd.DataFrame:
-    if url_arquivo.lower().endswith(".csv"):
-        df = pd.read_csv(url_arquivo)
-    else:
-        df = pd.read_excel(url_arquivo)
-    df.columns = [c.strip() for c in df.columns]
+def carregar_planilha(nome_arquivo: str) -> pd.DataFrame:
+    # arquivo vem da fonte configurada (fontes.py); só as colunas de COLUNAS_LEITURA
+    # são lidas: da tabela balde do producao.db se ele tem a versão atual do arquivo
+    # (python ingestao.py), senão da planilha em streaming, com cópia Parquet (planilhas.py).
+    # Os dois caminhos saem com os tipos do banco (ingestao.tipar).
+    caminho = fontes.caminho(nome_arquivo)
+    df = ingestao.ler_arquivo(caminho, colunas=COLUNAS_LEITURA)
+    if df is None:
+        df = ingestao.tipar(planilhas.ler_planilha(caminho, colunas=COLUNAS_LEITURA), "balde")
     return df
 
 def to_numeric_safe(series, default=0.0):
@@ -56,65 +71,58 @@ def to_numeric_safe(series, default=0.0):
 def to_date_safe(series):
     return pd.to_datetime(series, errors="coerce", dayfirst=True).dt.date
 
-def dias_uteis_no_mes(referencia: date, feriados: set) -> int:
-    ano, mes = referencia.year, referencia.month
-    _, ultimo_dia = calendar.monthrange(ano, mes)
-    dias = [
-        date(ano, mes, d)
-        for d in range(1, ultimo_dia + 1)
-        if date(ano, mes, d).weekday() < 5 and date(ano, mes, d) not in feriados
-    ]
-    return len(dias)
-
-def dias_uteis_passados_no_mes(referencia: date, feriados: set) -> int:
-    ano, mes = referencia.year, referencia.month
-    hoje = referencia
-    dias = [
-        date(ano, mes, d)
-        for d in range(1, hoje.day)  # até ontem
-        if date(ano, mes, d).weekday() < 5 and date(ano, mes, d) not in feriados
-    ]
-    return len(dias)
-
-def calcular_projecao(qtd_qualificadas_so_far: int, referencia: date, feriados: set, qtd_saldo_medio: int = 0, role: str = "qualificador") -> float:
+def calcular_projecao(qtd_qualificadas_so_far: int, referencia: date, qtd_saldo_medio: int = 0, role: str = "qualificador") -> float:
     # Se for master, soma qualificadas + saldo médio
     if role.lower() == "master":
         qtd_total = qtd_qualificadas_so_far + qtd_saldo_medio
     else:
         qtd_total = qtd_qualificadas_so_far
+    return float(qtd_total * fator_projecao(referencia))
 
-    uteis_totais = dias_uteis_no_mes(referencia, feriados)
-    uteis_passados = dias_uteis_passados_no_mes(referencia, feriados)
-
+def fator_projecao(referencia: date) -> float:
+    # ritmo por dia útil passado * dias úteis do mês = qtd * fator (calendario.py)
+    uteis_totais = calendario.dias_uteis_no_mes(referencia)
+    uteis_passados = calendario.dias_uteis_passados_no_mes(referencia)
     if uteis_passados == 0 or uteis_totais == 0:
-        return float(qtd_total)
+        return 1.0
+    return uteis_totais / uteis_passados
 
-    ritmo_diario = qtd_total / uteis_passados
-    return ritmo_diario * uteis_totais
 
+def _campos_data(df: pd.DataFrame) -> list:
+    return [col for col in df.columns if "DT_" in col or "DATA_" in col or col == "C6_PAY"]
 
-def formatar_tabela(df: pd.DataFrame, cor_hex: str) -> Styler:
-    df = df.copy().reset_index(drop=True)
+def preparar_tabela(df: pd.DataFrame) -> pd.DataFrame:
+    # Ajustes comuns às duas formas de exibir: datas e valores continuam tipados
+    df = df.reset_index(drop=True)
 
     #Formata CNPJ
-    df["CNPJ_CLIENTE"] = df["CNPJ_CLIENTE"].astype(str).str.zfill(14)
+    if "CNPJ_CLIENTE" in df.columns:
+        df["CNPJ_CLIENTE"] = df["CNPJ_CLIENTE"].astype(str).str.zfill(14)
 
-    # Formata datas
-    campos_data = [col for col in df.columns if "DT_" in col or "DATA_" in col or col == "C6_PAY"]
-    for col in campos_data:
+    # Datas como datetime
+    for col in _campos_data(df):
         if pd.api.types.is_datetime64_any_dtype(df[col]) or pd.api.types.is_object_dtype(df[col]):
-            df[col] = pd.to_datetime(df[col], errors="coerce").dt.strftime("%d/%m/%Y")
+            df[col] = pd.to_datetime(df[col], errors="coerce")
 
-    # Formata valores monetários e movimentações
-    campos_valores = ["CASH_IN_ATUAL", "1º_MES_MOV", "2º_MES_MOV", "3º_MES_MOV"]
-    for campo in campos_valores:
+    # Valores monetários e movimentações
+    for campo in CAMPOS_VALORES:
         if campo in df.columns:
             df[campo] = pd.to_numeric(df[campo], errors="coerce").fillna(0).round(2)
-            df[campo] = df[campo].map(lambda x: f"{x:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
 
     # Formata FL_QUALIFICADO como inteiro
     if "FL_QUALIFICADO" in df.columns:
         df["FL_QUALIFICADO"] = pd.to_numeric(df["FL_QUALIFICADO"], errors="coerce").fillna(0).astype(int)
+    return df
+
+def formatar_tabela(df: pd.DataFrame, cor_hex: str) -> Styler:
+    # Styler com fundo colorido em todas as células; só para tabelas pequenas (ver exibir_tabela)
+    df = preparar_tabela(df)
+    for col in _campos_data(df):
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].dt.strftime("%d/%m/%Y")
+    for campo in CAMPOS_VALORES:
+        if campo in df.columns:
+            df[campo] = df[campo].map(lambda x: f"{x:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
 
     # Estilo com cor de fundo e índice pintado
     return df.style.set_properties(**{'background-color': cor_hex}).set_table_styles([
@@ -122,17 +130,76 @@ def formatar_tabela(df: pd.DataFrame, cor_hex: str) -> Styler:
         {'selector': 'tbody th', 'props': [('background-color', cor_hex)]}
     ])
 
-def estilizar_tabela(df: pd.DataFrame, cor_hex: str) -> pd.io.formats.style.Styler:
-    return df.style.set_properties(**{'background-color': cor_hex}).set_table_styles([
-        {'selector': 'th', 'props': [('background-color', cor_hex)]},       # cabeçalho
-        {'selector': 'tbody th', 'props': [('background-color', cor_hex)]} # índice
-    ])
+def config_colunas(df: pd.DataFrame) -> dict:
+    # formatos aplicados pelo navegador (st.column_config), sem HTML por célula
+    config = {
+        col: st.column_config.DateColumn(col, format="DD/MM/YYYY")
+        for col in _campos_data(df) if pd.api.types.is_datetime64_any_dtype(df[col])
+    }
+    for campo in CAMPOS_VALORES:
+        if campo in df.columns:
+            config[campo] = st.column_config.NumberColumn(campo, format="localized")
+    return config
+
+def exibir_tabela(df: pd.DataFrame, cor_hex: str) -> None:
+    if len(df) <= LIMITE_STYLER:
+        st.dataframe(formatar_tabela(df, cor_hex), use_container_width=True)
+    else:
+        df = preparar_tabela(df)
+        st.dataframe(df, column_config=config_colunas(df), use_container_width=True)
+
+def classificar_status(status: pd.Series, consultor: pd.Series, role: str) -> pd.Categorical:
+    # Grupo de status da pizza, numa passada vetorizada (np.select) sobre STATUS já
+    # normalizado (strip/upper, vazio = ""). Primeira condição verdadeira vence.
+    novo_criterio = status.str.contains("NOVO CRITÉRIO", regex=False)
+    vazio = status.eq("")
+    if role == "master":
+        tem_consultor = consultor.fillna("").str.strip().ne("")
+        condicoes = [
+            novo_criterio | status.str.contains("INVÁLIDO", regex=False),
+            status.eq("SEM CONTATO"),
+            vazio & tem_consultor,
+            vazio,
+        ]
+        grupos = ["INVÁLIDO", "ORGÂNICA", "SEM CONTATO ESSE MÊS", "SEM QUALIFICADOR"]
+    else:
+        condicoes = [novo_criterio, vazio]
+        grupos = ["NOVO CRITÉRIO", "SEM CONTATO ESSE MÊS"]
+    return pd.Categorical(np.select(condicoes, grupos, default=status.astype(object)))
 
-def filtrar_por_consultor(df: pd.DataFrame, consultor_nome: str) -> pd.DataFrame:
+def filtrar_por_consultor(df: pd.DataFrame, consultor_nome: str, indice: dict | None = None) -> pd.DataFrame:
     if "CONSULTOR" not in df.columns:
         return df
+    if indice is not None:
+        return particoes.fatia(df, indice, consultor_nome)
     return df[df["CONSULTOR"].fillna("").str.strip().str.casefold() == consultor_nome.strip().casefold()]
 
+def versao_arquivo(nome_arquivo: str) -> tuple:
+    # (tamanho, mtime_ns) do arquivo na fonte: entra na chave de carregar_balde, e um
+    # balde republicado é relido já no próximo rerun (sem esperar o TTL)
+    info = fontes.caminho(nome_arquivo).stat()
+    return info.st_size, info.st_mtime_ns
+
+@cache.dataset
+def carregar_balde(nome_arquivo: str, versao: tuple) -> tuple:
+    # Balde normalizado uma vez por versão do arquivo + índice de linhas por consultor.
+    # Os dois ficam na mesma entrada do cache, então as posições sempre batem com o frame.
+    # versao (versao_arquivo) só entra na chave.
+    df = carregar_planilha(nome_arquivo)
+    status = df.get("STATUS", pd.Series("", index=df.index)).fillna("").astype(str).str.strip().str.upper()
+    consultor = df.get("CONSULTOR", pd.Series("", index=df.index))
+    # STATUS como categoria: os filtros das tabelas viram comparação de códigos
+    df["STATUS"] = status.astype("category")
+    df["STATUS_GRUPO"] = classificar_status(status, consultor, "qualificador")
+    df["STATUS_GRUPO_MASTER"] = classificar_status(status, consultor, "master")
+    df["CASH_IN_ATUAL"] = to_numeric_safe(df.get("CASH_IN_ATUAL", pd.Series(dtype=float)))
+    df["PREVISAO"] = to_numeric_safe(df.get("PREVISAO", pd.Series(dtype=float)))
+
+    for col in ["DT_1º_CTT", "DT_ULTIMO_CTT", "DT_QUALIFICADA", "DT_CONTA_CRIADA", "DATA_PROMESSA", "DATA_PREVISTA"]:
+        if col in df.columns:
+            df[col] = to_date_safe(df[col])
+    return df, particoes.indexar_por_consultor(df)
+
 def selecionar_colunas_padrao(df: pd.DataFrame) -> pd.DataFrame:
     cols_existentes = [c for c in TABELA_COLUNAS if c in df.columns]
     return df[cols_existentes].reset_index(drop=True)
@@ -145,33 +212,26 @@ def exibir_dashboard(user_config: dict, authenticator):
     st.title("📊 Dashboard - Qualificação")
     role = user_config.get("role", "").lower()
 
-    url_arquivo = "https://github.com/Augusto05/atlas/raw/refs/heads/main/first-atlas/balde_2025-11.xlsx"
+    # balde mais recente publicado na fonte (manifesto.py)
+    mes_balde = manifesto.ultimo_mes("balde")
+    if mes_balde is None:
+        st.warning("Nenhuma planilha de balde encontrada.")
+        return
+    nome_arquivo = manifesto.atual().caminho("balde", mes_balde).name
 
     try:
-        df_raw = carregar_planilha(url_arquivo)
+        # visão do cache (copy-on-write), já normalizada; alterações aqui não afetam a entrada
+        df, indice_consultores = carregar_balde(nome_arquivo, versao_arquivo(nome_arquivo))
     except Exception as e:
         st.error(f"Erro ao carregar a planilha: {e}")
         return
 
-    df = df_raw.copy()
-
-    # Normaliza campos
-    if "STATUS" in df.columns:
-        df["STATUS"] = df["STATUS"].fillna("").str.strip().str.upper()
-    df["CASH_IN_ATUAL"] = to_numeric_safe(df.get("CASH_IN_ATUAL", pd.Series(dtype=float)))
-    df["PREVISAO"] = to_numeric_safe(df.get("PREVISAO", pd.Series(dtype=float)))
-
-
-    for col in ["DT_1º_CTT", "DT_ULTIMO_CTT", "DT_QUALIFICADA", "DT_CONTA_CRIADA", "DATA_PROMESSA", "DATA_PREVISTA"]:
-        if col in df.columns:
-            df[col] = to_date_safe(df[col])
-
     if role == "qualificador":
         consultor_nome = user_config.get("name", "").strip()
-        df_consultor = filtrar_por_consultor(df, consultor_nome)
+        df_consultor = filtrar_por_consultor(df, consultor_nome, indice_consultores)
     else:
         # 🔹 Se for MASTER → vê todos os dados
-        df_consultor = df.copy()    
+        df_consultor = df
     # KPIs
     criterios_excluir = [
         "CLIENTE COM CONTA BLOQUEADA",
@@ -181,31 +241,31 @@ def exibir_dashboard(user_config: dict, authenticator):
     ]
     df_balde_valido = df_consultor[~df_consultor["CRITERIOS_MES_ATUAL"].isin(criterios_excluir)]
 
+    # contagens por status numa única passada (STATUS é categoria)
+    contagem_status = df_consultor["STATUS"].value_counts()
+    mascara_qualificado = (df_consultor["STATUS"] == STATUS_QUALIFICADO).to_numpy()
     if role == "master":
         # Qualificadas: FL_QUALIFICADO = 1 e CASH_IN_ATUAL >= 6000
-        qtd_qualificadas = int(
-            df_consultor[(df_consultor["FL_QUALIFICADO"] == 1) & (df_consultor["CASH_IN_ATUAL"] >= 6000)].shape[0]
-        )
-
         # Saldo médio: FL_QUALIFICADO = 1 e CASH_IN_ATUAL < 6000
-        qtd_saldo_medio = int(
-            df_consultor[(df_consultor["FL_QUALIFICADO"] == 1) & (df_consultor["CASH_IN_ATUAL"] < 6000)].shape[0]
-        )
+        fl_qualificado = df_consultor["FL_QUALIFICADO"].to_numpy() == 1
+        acima_corte = df_consultor["CASH_IN_ATUAL"].to_numpy() >= 6000
+        qtd_qualificadas = int(np.count_nonzero(fl_qualificado & acima_corte))
+        qtd_saldo_medio = int(np.count_nonzero(fl_qualificado & ~acima_corte))
     else:
         # Qualificador continua com a lógica antiga
-        qtd_qualificadas = int((df_consultor["STATUS"] == STATUS_QUALIFICADO).sum())
-        qtd_saldo_medio = int((df_consultor["STATUS"] == STATUS_SALDO_MEDIO).sum())
-    qtd_promessas = int((df_consultor["STATUS"] == STATUS_PROMESSA).sum())
-    proj = calcular_projecao(qtd_qualificadas, date.today(), FERIADOS_FIXOS, qtd_saldo_medio, role)
+        qtd_qualificadas = int(contagem_status.get(STATUS_QUALIFICADO, 0))
+        qtd_saldo_medio = int(contagem_status.get(STATUS_SALDO_MEDIO, 0))
+    qtd_promessas = int(contagem_status.get(STATUS_PROMESSA, 0))
+    proj = calcular_projecao(qtd_qualificadas, date.today(), qtd_saldo_medio, role)
     if role == "master":
         # Faturamento: soma PREVISAO apenas das linhas qualificadas (FL_QUALIFICADO = 1)
         faturamento_total = float(
-            df_consultor.loc[df_consultor["FL_QUALIFICADO"] == 1, "PREVISAO"].sum()
+            df_consultor.loc[fl_qualificado, "PREVISAO"].sum()
         )
     else:
         # Qualificador continua com a lógica antiga
         faturamento_total = float(
-            df_consultor.loc[df_consultor["STATUS"] == STATUS_QUALIFICADO, "PREVISAO"].sum()
+            df_consultor.loc[mascara_qualificado, "PREVISAO"].sum()
         )
     balde_total = int(df_balde_valido.shape[0])
 
@@ -232,7 +292,7 @@ def exibir_dashboard(user_config: dict, authenticator):
     st.sidebar.text_input("ICM", value=f"{icm:.1f}%")  # agora editável
 
     # Média de qualificação por dia
-    dias_passados = dias_uteis_passados_no_mes(date.today(), FERIADOS_FIXOS)
+    dias_passados = calendario.dias_uteis_passados_no_mes(date.today())
     media_por_dia = 0
     if dias_passados > 0:
         media_por_dia = qtd_qualificadas / dias_passados
@@ -257,20 +317,20 @@ def exibir_dashboard(user_config: dict, authenticator):
     df_prestes = df_consultor[
         (df_consultor["CASH_IN_ATUAL"] > 1000) &
         (df_consultor["CASH_IN_ATUAL"] < 6000) &
-        (df_consultor["STATUS"] != STATUS_QUALIFICADO)
+        ~mascara_qualificado
     ]
     df_prestes = df_prestes.sort_values(by="CASH_IN_ATUAL", ascending=False)
     df_prestes = selecionar_colunas_padrao(df_prestes)
-    st.dataframe(formatar_tabela(df_prestes, "#E7F0FF"), use_container_width=True)
+    exibir_tabela(df_prestes, "#E7F0FF")
 
 
     st.divider()
 
     # Tabela 2: Qualificadas
     st.subheader("Clientes qualificados")
-    df_qual = df_consultor[df_consultor["STATUS"] == STATUS_QUALIFICADO]
+    df_qual = df_consultor[mascara_qualificado]
     df_qual = selecionar_colunas_padrao(df_qual)
-    st.dataframe(formatar_tabela(df_qual, "#E9F7EF"), use_container_width=True)
+    exibir_tabela(df_qual, "#E9F7EF")
 
     st.divider()
 
@@ -280,21 +340,21 @@ def exibir_dashboard(user_config: dict, authenticator):
     with st.expander("Mostrar/ocultar promessas", expanded=False):
         df_prom = df_consultor[df_consultor["STATUS"] == STATUS_PROMESSA]
         df_prom = selecionar_colunas_padrao(df_prom)
-        st.dataframe(formatar_tabela(df_prom, "#FFF9E6"), use_container_width=True)
+        exibir_tabela(df_prom, "#FFF9E6")
 
     # Tabela 4: Saldos médios (expandível)
     st.subheader("Saldos médios")
     with st.expander("Mostrar/ocultar saldos médios", expanded=False):
         df_medios = df_consultor[df_consultor["STATUS"] == STATUS_SALDO_MEDIO]
         df_medios = selecionar_colunas_padrao(df_medios)
-        st.dataframe(formatar_tabela(df_medios, "#EFFFFE"), use_container_width=True)
+        exibir_tabela(df_medios, "#EFFFFE")
 
     # Tabela 5: Novos critérios (expandível)
     st.subheader("Novos critérios")
     with st.expander("Mostrar/ocultar novos critérios", expanded=False):
         df_novos = df_consultor[df_consultor["STATUS"].str.startswith("NOVO CRITÉRIO", na=False)]
         df_novos = selecionar_colunas_padrao(df_novos)
-        st.dataframe(formatar_tabela(df_novos, "#F2F2F2"), use_container_width=True)
+        exibir_tabela(df_novos, "#F2F2F2")
     
     # Tabela 6: Contas Inválidas (expandível)
     st.subheader("Contas inválidas")
@@ -306,7 +366,7 @@ def exibir_dashboard(user_config: dict, authenticator):
         ]
         df_invalidas = df_consultor[df_consultor["CRITERIOS_MES_ATUAL"].isin(CRITERIOS_INVALIDOS)]
         df_invalidas = selecionar_colunas_padrao(df_invalidas)
-        st.dataframe(formatar_tabela(df_invalidas, "#FDEDEC"), use_container_width=True)
+        exibir_tabela(df_invalidas, "#FDEDEC")
     
  
 
@@ -320,46 +380,10 @@ def exibir_dashboard(user_config: dict, authenticator):
     # 1. Distribuição por Status (gráfico de pizza em tons de azul)
     # ---------------------------
     with col1:
-        if role == "qualificador":
-            def normalizar_status(valor):
-                v = str(valor).strip().upper()
-                if "NOVO CRITÉRIO" in v:
-                    return "NOVO CRITÉRIO"
-                elif v == "":
-                    return "SEM CONTATO ESSE MÊS"
-                else:
-                    return v
-        
-            df_consultor["STATUS"] = df_consultor["STATUS"].apply(normalizar_status)
-        elif role == "master":
-            def normalizar_status(row):
-                # captura status e consultor com segurança
-                status_raw = row.get("STATUS", "")
-                consultor_raw = row.get("CONSULTOR", "")
-
-                v = str(status_raw).strip().upper()
-                consultor = str(consultor_raw).strip()
-
-                # unificar inválidos
-                if "NOVO CRITÉRIO" in v or "INVÁLIDO" in v:
-                    return "INVÁLIDO"
-                
-                if v == "SEM CONTATO":
-                    return "ORGÂNICA"
-
-                # vazio -> decidir por consultor
-                if v == "" or pd.isna(status_raw):
-                    if consultor != "" and not pd.isna(consultor_raw):
-                        return "SEM CONTATO ESSE MÊS"
-                    else:
-                        return "SEM QUALIFICADOR"
-
-                # mantém o status original normalizado
-                return v
-
-            df_consultor["STATUS"] = df_consultor.apply(normalizar_status, axis=1)
-
-        status_counts = df_consultor["STATUS"].value_counts()
+        # grupos calculados uma vez por versão do balde em carregar_balde (classificar_status)
+        coluna_grupo = "STATUS_GRUPO_MASTER" if role == "master" else "STATUS_GRUPO"
+        status_counts = df_consultor[coluna_grupo].value_counts()
+        status_counts = status_counts[status_counts > 0]
         status_df = pd.DataFrame({
             "STATUS": status_counts.index,
             "QTD": status_counts.values
@@ -401,16 +425,14 @@ def exibir_dashboard(user_config: dict, authenticator):
     df_consultor["DT_QUALIFICADA"] = pd.to_datetime(df_consultor["DT_QUALIFICADA"], errors="coerce")
 
     if "DT_QUALIFICADA" in df_consultor.columns:
-        df_pdu = df_consultor[df_consultor["STATUS"] == STATUS_QUALIFICADO].copy()
+        df_pdu = df_consultor[mascara_qualificado].copy()
         df_pdu["DT_QUALIFICADA"] = pd.to_datetime(df_pdu["DT_QUALIFICADA"], errors="coerce").dt.date
 
         # Agrupa por dia útil
         pdu_counts = df_pdu.groupby("DT_QUALIFICADA").size().reset_index(name="Qualificadas")
 
         # Remove finais de semana e feriados
-        pdu_counts = pdu_counts[
-            pdu_counts["DT_QUALIFICADA"].apply(lambda d: d.weekday() < 5 and d not in FERIADOS_FIXOS)
-        ]
+        pdu_counts = pdu_counts[calendario.eh_dia_util(pdu_counts["DT_QUALIFICADA"])]
 
         fig_pdu = px.line(
             pdu_counts,
@@ -434,9 +456,11 @@ def exibir_dashboard(user_config: dict, authenticator):
             (df["CONSULTOR"].str.upper() != "ORGÂNICA") &
             (~df["CRITERIOS_MES_ATUAL"].isin(criterios_excluir))
         ]
-        df_consultores = df_filtrado.groupby("CONSULTOR").agg(
+        df_consultores = df_filtrado.assign(
+            QUALIFICADAS=df_filtrado["STATUS"] == STATUS_QUALIFICADO
+        ).groupby("CONSULTOR").agg(
             BALDE=("CNPJ_CLIENTE", "count"),
-            QUALIFICADAS=("STATUS", lambda x: (x == STATUS_QUALIFICADO).sum())
+            QUALIFICADAS=("QUALIFICADAS", "sum")
         ).reset_index()
 
         fig_balde = px.bar(
@@ -449,16 +473,16 @@ def exibir_dashboard(user_config: dict, authenticator):
         )
         st.plotly_chart(fig_balde, use_container_width=True)
 
-        def resumo_consultor(grupo):
-            return pd.Series({
-                "QUALIFICADAS": (grupo["STATUS"] == STATUS_QUALIFICADO).sum(),
-                "SALDO_MEDIO": (grupo["STATUS"] == STATUS_SALDO_MEDIO).sum(),
-                "PROMESSAS": (grupo["STATUS"] == STATUS_PROMESSA).sum(),
-                "FATURAMENTO": grupo.loc[grupo["STATUS"] == STATUS_QUALIFICADO, "PREVISAO"].sum()
-            })
-
+        # Uma coluna por indicador (0/1 ou valor) e um único groupby().sum()
         df_filtrado = df[df["CONSULTOR"].str.upper() != "ORGANICA"]
-        df_ranking = df_filtrado.groupby("CONSULTOR").apply(resumo_consultor)
+        qualificada = df_filtrado["STATUS"] == STATUS_QUALIFICADO
+        df_ranking = pd.DataFrame({
+            "CONSULTOR": df_filtrado["CONSULTOR"],
+            "QUALIFICADAS": qualificada.astype(int),
+            "SALDO_MEDIO": (df_filtrado["STATUS"] == STATUS_SALDO_MEDIO).astype(int),
+            "PROMESSAS": (df_filtrado["STATUS"] == STATUS_PROMESSA).astype(int),
+            "FATURAMENTO": df_filtrado["PREVISAO"].where(qualificada, 0.0),
+        }).groupby("CONSULTOR").sum()
         df_ranking = df_ranking.sort_values(by="QUALIFICADAS", ascending=False).reset_index()
         df_ranking.index = range(1, len(df_ranking) + 1)
 
@@ -466,20 +490,16 @@ def exibir_dashboard(user_config: dict, authenticator):
         df_ranking["FATURAMENTO_NUM"] = pd.to_numeric(df_ranking.get("FATURAMENTO", 0), errors="coerce").fillna(0.0)
 
         # Calcula ticket médio (faturamento sobre aprovadas), comissão atual (4%) e projeção
-        df_ranking["TICKET_MEDIO_NUM"] = df_ranking.apply(
-            lambda r: (r["FATURAMENTO_NUM"] / r["QUALIFICADAS"]) if (r.get("QUALIFICADAS") and r["QUALIFICADAS"] > 0) else 0.0,
-            axis=1
+        faturamento = df_ranking["FATURAMENTO_NUM"].to_numpy(dtype=float)
+        qualificadas = df_ranking["QUALIFICADAS"].to_numpy(dtype=float)
+        df_ranking["TICKET_MEDIO_NUM"] = np.divide(
+            faturamento, qualificadas, out=np.zeros_like(faturamento), where=qualificadas > 0
         )
         df_ranking["COMISSAO_ATUAL_NUM"] = df_ranking["FATURAMENTO_NUM"] * 0.04
         # Projeção em reais: estimativa por consultor = projeção de qualificadas (PDU) * ticket médio
-        def projetar_faturamento_por_linha(row):
-            qtd_qual = int(row.get("QUALIFICADAS", 0))
-            qtd_saldo = int(row.get("SALDO_MEDIO", 0))
-            proj_qtd = calcular_projecao(qtd_qual, date.today(), FERIADOS_FIXOS, qtd_saldo_medio=qtd_saldo, role=("master" if role == "master" else "qualificador"))
-            ticket = float(row.get("TICKET_MEDIO_NUM", 0.0))
-            return float(proj_qtd) * ticket
-
-        df_ranking["FATURAMENTO_PROJETADO_NUM"] = df_ranking.apply(projetar_faturamento_por_linha, axis=1)
+        # (master projeta qualificadas + saldo médio, como em calcular_projecao)
+        proj_qtd = (qualificadas + df_ranking["SALDO_MEDIO"].to_numpy(dtype=float)) * fator_projecao(date.today())
+        df_ranking["FATURAMENTO_PROJETADO_NUM"] = proj_qtd * df_ranking["TICKET_MEDIO_NUM"].to_numpy()
         df_ranking["COMISSAO_PROJETADA_NUM"] = df_ranking["FATURAMENTO_PROJETADO_NUM"] * 0.04
 
         # Formatação brasileira (1.234,56)
@@ -501,8 +521,10 @@ def exibir_dashboard(user_config: dict, authenticator):
 
 
     
-    # Tabela 5: Balde completo
+    # Tabela 5: Balde completo, com STATUS agrupado como na pizza (grupo já calculado
+    # em carregar_balde); as demais tabelas mostram o STATUS da planilha
     st.subheader("Balde completo de clientes")
-    df_balde = selecionar_colunas_padrao(df_consultor)
-    st.dataframe(formatar_tabela(df_balde, "#FFFFFF"), use_container_width=True)
+    coluna_grupo = "STATUS_GRUPO_MASTER" if role == "master" else "STATUS_GRUPO"
+    df_balde = selecionar_colunas_padrao(df_consultor.assign(STATUS=df_consultor[coluna_grupo]))
+    exibir_tabela(df_balde, "#FFFFFF")
 
@@ -0,0 +1,93 @@
+# exportacao.py — exportação das contas de produção, gerada sob demanda
+#
+# Mesmo desenho do atlas/exportacao.py: o arquivo é escrito em lotes (cada mês em
+# fatias de TAMANHO_LOTE linhas), e CSV e Parquet não juntam o período inteiro num
+# frame só. Quem chama fornece os frames dos meses (visões do cache de datasets).
+import io
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # sem pyarrow a opção Parquet não aparece
+    pa = pq = None
+
+TAMANHO_LOTE = 5000
+
+FORMATOS = {
+    "xlsx": ("Excel (.xlsx)", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": ("CSV (.csv)", "text/csv"),
+    "parquet": ("Parquet (.parquet)", "application/octet-stream"),
+}
+
+
+def formatos_disponiveis() -> list:
+    return [f for f in FORMATOS if f != "parquet" or pq is not None]
+
+
+def rotulo(formato: str) -> str:
+    return FORMATOS[formato][0]
+
+
+def mime(formato: str) -> str:
+    return FORMATOS[formato][1]
+
+
+def nome_arquivo(formato: str, meses: tuple) -> str:
+    periodo = meses[0] if len(meses) == 1 else f"{meses[0]}_a_{meses[-1]}"
+    return f"contas_{periodo}.{formato}"
+
+
+def lotes(frames: list):
+    # frames: um DataFrame por mês. Todos os lotes saem com as mesmas colunas (a união,
+    # na ordem em que aparecem) e tipos: coluna ausente num mês sai vazia, e categoria
+    # vira texto (as categorias mudam de um mês para outro)
+    tipos = {}
+    for df in frames:
+        for col, tipo in df.dtypes.items():
+            tipos.setdefault(col, "string" if isinstance(tipo, pd.CategoricalDtype) else tipo)
+    for df in frames:
+        for inicio in range(0, len(df), TAMANHO_LOTE):
+            yield df.iloc[inicio:inicio + TAMANHO_LOTE].reindex(columns=list(tipos)).astype(tipos)
+
+
+def _csv(lotes) -> bytes:
+    # ";" + BOM para abrir direto no Excel em pt-BR
+    saida = io.BytesIO()
+    for i, lote in enumerate(lotes):
+        texto = lote.to_csv(index=False, header=i == 0, sep=";", date_format="%d/%m/%Y")
+        saida.write(texto.encode("utf-8-sig" if i == 0 else "utf-8"))
+    return saida.getvalue()
+
+
+def _parquet(lotes) -> bytes:
+    # schema do primeiro lote; lotes() garante os mesmos tipos nos seguintes
+    saida = io.BytesIO()
+    writer = None
+    try:
+        for lote in lotes:
+            tabela = pa.Table.from_pandas(lote, schema=writer.schema if writer else None, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(saida, tabela.schema, compression="zstd")
+            writer.write_table(tabela)
+    finally:
+        if writer is not None:
+            writer.close()
+    return saida.getvalue()
+
+
+def _xlsx(lotes) -> bytes:
+    # o xlsxwriter mantém a pasta em memória; para períodos grandes prefira CSV ou Parquet
+    saida = io.BytesIO()
+    with pd.ExcelWriter(saida, engine="xlsxwriter") as writer:
+        linha = 0
+        for lote in lotes:
+            lote.to_excel(writer, index=False, header=linha == 0, sheet_name="Contas", startrow=linha)
+            linha += len(lote) + (linha == 0)
+    return saida.getvalue()
+
+
+def gerar_arquivo(formato: str, frames: list) -> bytes:
+    escritores = {"xlsx": _xlsx, "csv": _csv, "parquet": _parquet}
+    return escritores[formato](lotes(frames))
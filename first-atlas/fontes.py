@@ -0,0 +1,124 @@
+# fontes.py — de onde vêm as planilhas dos dashboards
+#
+# Os dashboards pedem um arquivo pelo nome (ex.: "producao_2026-03.xlsx") e a
+# fonte configurada devolve um caminho local, que planilhas.py lê (com cache Parquet).
+#
+#   FonteLocal (padrão): procura o arquivo na pasta do app e em arq/.
+#   FonteHTTP: baixa de url_base com requisição condicional (ETag / If-Modified-Since)
+#              e guarda a cópia em disco; 304 ou falha de rede reaproveitam a cópia.
+#
+# Para usar HTTP, acrescente ao config.yaml:
+#   fonte_dados:
+#     tipo: http
+#     url_base: https://github.com/Augusto05/atlas/raw/refs/heads/main/first-atlas/
+import json
+import os
+import shutil
+import tempfile
+import urllib.error
+import urllib.request
+from pathlib import Path
+from urllib.parse import quote
+
+BASE_DIR = Path(__file__).resolve().parent
+CACHE_HTTP_DIR = BASE_DIR / ".cache_planilhas" / "http"
+PASTAS_PADRAO = (BASE_DIR, BASE_DIR / "arq")
+
+
+class FonteLocal:
+    def __init__(self, pastas=PASTAS_PADRAO):
+        # caminhos relativos são relativos à pasta do app
+        self.pastas = [BASE_DIR / p for p in pastas]
+
+    def caminho(self, nome_arquivo: str) -> Path:
+        for pasta in self.pastas:
+            caminho = pasta / nome_arquivo
+            if caminho.is_file():
+                return caminho
+        raise FileNotFoundError(f"{nome_arquivo} não encontrado em {', '.join(map(str, self.pastas))}")
+
+
+def _gravar_atomico(caminho: Path, texto: str) -> None:
+    with tempfile.NamedTemporaryFile("w", dir=caminho.parent, prefix=f"{caminho.name}.",
+                                     suffix=".tmp", delete=False) as f:
+        f.write(texto)
+    os.replace(f.name, caminho)
+
+
+class FonteHTTP:
+    def __init__(self, url_base: str, pasta_cache=CACHE_HTTP_DIR, timeout: float = 30):
+        self.url_base = url_base if url_base.endswith("/") else url_base + "/"
+        self.pasta_cache = Path(pasta_cache)
+        self.timeout = timeout
+
+    def caminho(self, nome_arquivo: str) -> Path:
+        destino = self.pasta_cache / nome_arquivo
+        arquivo_meta = destino.with_name(destino.name + ".meta.json")
+        meta = {}
+        if destino.is_file() and arquivo_meta.is_file():
+            meta = json.loads(arquivo_meta.read_text())
+
+        pedido = urllib.request.Request(self.url_base + quote(nome_arquivo))
+        if meta.get("etag"):
+            pedido.add_header("If-None-Match", meta["etag"])
+        if meta.get("last_modified"):
+            pedido.add_header("If-Modified-Since", meta["last_modified"])
+
+        try:
+            with urllib.request.urlopen(pedido, timeout=self.timeout) as resposta:
+                self.pasta_cache.mkdir(parents=True, exist_ok=True)
+                # baixa num temporário exclusivo e renomeia: sessões são threads do mesmo
+                # processo, e a cópia em disco nunca fica pela metade
+                with tempfile.NamedTemporaryFile(dir=self.pasta_cache, prefix=f"{destino.name}.",
+                                                 suffix=".tmp", delete=False) as f:
+                    temporario = Path(f.name)
+                    try:
+                        shutil.copyfileobj(resposta, f, 1024 * 1024)
+                    except BaseException:
+                        f.close()
+                        temporario.unlink(missing_ok=True)
+                        raise
+                os.replace(temporario, destino)
+                _gravar_atomico(arquivo_meta, json.dumps({
+                    "etag": resposta.headers.get("ETag"),
+                    "last_modified": resposta.headers.get("Last-Modified"),
+                }))
+        except urllib.error.HTTPError as erro:
+            # urllib trata 304 (não modificado) como erro
+            if erro.code == 304 and destino.is_file():
+                return destino
+            if erro.code == 404:
+                raise FileNotFoundError(f"{nome_arquivo} não encontrado em {self.url_base}") from erro
+            if not destino.is_file():
+                raise
+        except urllib.error.URLError:
+            # sem rede: serve a última cópia baixada, se houver
+            if not destino.is_file():
+                raise
+        return destino
+
+
+_fonte = FonteLocal()
+
+
+def configurar(opcoes: dict | None) -> None:
+    # opcoes = config.get("fonte_dados"); ausente -> FonteLocal
+    global _fonte
+    opcoes = opcoes or {}
+    tipo = opcoes.get("tipo", "local")
+    if tipo == "http":
+        _fonte = FonteHTTP(opcoes["url_base"], timeout=opcoes.get("timeout", 30))
+    elif tipo == "local":
+        _fonte = FonteLocal(opcoes.get("pastas") or PASTAS_PADRAO)
+    else:
+        raise ValueError(f"fonte_dados.tipo desconhecido: {tipo}")
+
+
+def caminho(nome_arquivo: str) -> Path:
+    return _fonte.caminho(nome_arquivo)
+
+
+def pastas_locais() -> list:
+    # pastas indexadas por manifesto.py; HTTP não lista diretório, então o índice
+    # usa o checkout local (o mesmo conteúdo publicado em url_base)
+    return _fonte.pastas if isinstance(_fonte, FonteLocal) else list(PASTAS_PADRAO)
@@ -0,0 +1,366 @@
+# ingestao.py — carga das planilhas de produção e balde para o SQLite (producao.db)
+#
+# Uso:
+#   python ingestao.py                 -> carrega producao_*.xlsx / balde_*.xlsx da pasta e de arq/
+#   python ingestao.py arq/x.xlsx ...  -> carrega só os arquivos indicados (.xlsx ou .csv)
+#   python ingestao.py --forcar        -> recarrega mesmo arquivos já carregados
+#
+# Cada arquivo é carregado numa única transação, em lotes com executemany:
+# as linhas anteriores do arquivo são apagadas e todas as linhas da planilha
+# entram de novo, uma por linha (chave arquivo + número da linha), sem juntar
+# linhas repetidas. Arquivos já carregados (mesmo SHA-256) são pulados, então
+# rodar de novo só processa o que mudou.
+#
+# Os dashboards só usam o banco (ler_arquivo) quando o registro do arquivo em
+# arquivos_carregados bate com o arquivo atual: tamanho e mtime iguais bastam; se
+# mudaram, o SHA-256 decide (cópia com o mesmo conteúdo continua valendo). Se a
+# planilha foi republicada e a ingestão não rodou de novo, lêem a planilha.
+# Nos dois caminhos as colunas conhecidas passam por tipar(), então o frame tem
+# os mesmos tipos e valores venha do banco ou da planilha.
+import argparse
+import hashlib
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+import fontes
+import manifesto
+
+BASE_DIR = Path(__file__).resolve().parent
+DB_PATH = BASE_DIR / "producao.db"
+TAMANHO_LOTE = 1000
+# versão do schema (PRAGMA user_version); o banco é derivado das planilhas, então
+# uma versão antiga é descartada e recarregada na próxima ingestão
+VERSAO_SCHEMA = 2
+
+# tipo -> conversão aplicada à coluna inteira (ver _converter)
+# "texto", "cnpj" (só dígitos, 14 posições), "data" (ISO YYYY-MM-DD), "real", "inteiro"
+ESPECIFICACOES = {
+    "producao": {
+        "tabela": "producao",
+        "obrigatorias": ("CNPJ", "DATA_BASE"),
+        "colunas": {  # coluna da planilha -> (coluna no banco, tipo)
+            "DATA_BASE": ("data_base", "data"),
+            "CNPJ": ("cnpj", "cnpj"),
+            "NOME_CLIENTE": ("nome_cliente", "texto"),
+            "CONSULTOR": ("consultor", "texto"),
+            "ORIGEM": ("origem", "texto"),
+            "STATUS_ABERTURA": ("status_abertura", "texto"),
+            "PENDENCIAS": ("pendencias", "texto"),
+            "SQUAD": ("squad", "texto"),
+            "LIDER": ("lider", "texto"),
+        },
+    },
+    "balde": {
+        "tabela": "balde",
+        "obrigatorias": ("CNPJ_CLIENTE", "DATA_BASE"),
+        "colunas": {
+            "DATA_BASE": ("data_base", "data"),
+            "CNPJ_CLIENTE": ("cnpj_cliente", "cnpj"),
+            "NOME_CLIENTE": ("nome_cliente", "texto"),
+            "TELEFONE_MASTER": ("telefone_master", "texto"),
+            "CONSULTOR": ("consultor", "texto"),
+            "STATUS": ("status", "texto"),
+            "DT_1º_CTT": ("dt_primeiro_ctt", "data"),
+            "DT_ULTIMO_CTT": ("dt_ultimo_ctt", "data"),
+            "DT_QUALIFICADA": ("dt_qualificada", "data"),
+            "DT_CONTA_CRIADA": ("dt_conta_criada", "data"),
+            "DATA_PROMESSA": ("data_promessa", "data"),
+            "DATA_PREVISTA": ("data_prevista", "data"),
+            "CHAVES_PIX_FORTE": ("chaves_pix_forte", "texto"),
+            "CASH_IN_ATUAL": ("cash_in_atual", "real"),
+            "C6_PAY": ("c6_pay", "texto"),
+            "FL_QUALIFICADO": ("fl_qualificado", "inteiro"),
+            "CRITERIOS_MES_ATUAL": ("criterios_mes_atual", "texto"),
+            "1º_MES_MOV": ("mes_mov_1", "real"),
+            "2º_MES_MOV": ("mes_mov_2", "real"),
+            "3º_MES_MOV": ("mes_mov_3", "real"),
+            "PREVISAO": ("previsao", "real"),
+            "PERFIL M": ("perfil_m", "texto"),
+        },
+    },
+}
+
+TIPOS_SQL = {"texto": "TEXT", "cnpj": "TEXT", "data": "TEXT", "real": "REAL", "inteiro": "INTEGER"}
+
+# ---------------------------
+# Banco
+# ---------------------------
+
+def conectar(db_path=DB_PATH) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(db_path), timeout=10, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=10000")
+    return conn
+
+
+def criar_schema(conn: sqlite3.Connection) -> None:
+    versao = conn.execute("PRAGMA user_version").fetchone()[0]
+    if versao < VERSAO_SCHEMA:
+        # v1 juntava linhas por (CNPJ, data base); as tabelas são recriadas e os
+        # arquivos recarregados por inteiro na próxima ingestão
+        for tabela in [espec["tabela"] for espec in ESPECIFICACOES.values()] + ["arquivos_carregados"]:
+            conn.execute(f"DROP TABLE IF EXISTS {tabela}")
+
+    for espec in ESPECIFICACOES.values():
+        colunas = [f"{col} {TIPOS_SQL[tipo]}" for col, tipo in espec["colunas"].values()]
+        # arquivo + linha (posição na planilha) identificam a linha; mes (YYYY-MM)
+        # derivado de data_base; extras guarda as demais colunas da planilha em JSON
+        conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {espec['tabela']} (
+            arquivo TEXT NOT NULL,
+            linha INTEGER NOT NULL,
+            {", ".join(colunas)},
+            mes TEXT,
+            extras TEXT,
+            PRIMARY KEY (arquivo, linha)
+        )
+        """)
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{espec['tabela']}_mes_consultor ON {espec['tabela']}(mes, consultor)")
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS arquivos_carregados (
+        caminho TEXT PRIMARY KEY,
+        tipo TEXT NOT NULL,
+        sha256 TEXT NOT NULL,
+        tamanho INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        linhas INTEGER NOT NULL,
+        carregado_em TEXT NOT NULL
+    )
+    """)
+    conn.execute(f"PRAGMA user_version = {VERSAO_SCHEMA}")
+    conn.commit()
+
+# ---------------------------
+# Leitura e conversão
+# ---------------------------
+
+def tipo_do_arquivo(caminho: Path) -> str | None:
+    # tipo exato pelo nome (manifesto.py): producao_prospec/balde_quali/balde_c6pay
+    # têm layouts próprios e não entram nas tabelas producao/balde
+    chave = manifesto.classificar(caminho.name)
+    if chave and chave[0] in ESPECIFICACOES:
+        return chave[0]
+    return None
+
+
+def sha256_arquivo(caminho: Path) -> str:
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _ler_planilha(caminho: Path) -> pd.DataFrame:
+    # CNPJs como texto para não perder zeros à esquerda
+    dtype = {"CNPJ": str, "CNPJ_CLIENTE": str}
+    if caminho.suffix.lower() == ".csv":
+        df = pd.read_csv(caminho, dtype=dtype)
+    else:
+        df = pd.read_excel(caminho, dtype=dtype)
+    df.columns = [str(c).strip() for c in df.columns]
+    return df
+
+
+def _para_data(serie: pd.Series) -> pd.Series:
+    return pd.to_datetime(serie, errors="coerce", dayfirst=True)
+
+
+def _converter(serie: pd.Series, tipo: str) -> pd.Series:
+    if tipo == "data":
+        return _para_data(serie).dt.strftime("%Y-%m-%d")
+    if tipo == "real":
+        return pd.to_numeric(serie, errors="coerce")
+    if tipo == "inteiro":
+        return pd.to_numeric(serie, errors="coerce").round().astype("Int64")
+    # números lidos como float pelo Excel (ex.: telefones) perdem o ".0"
+    texto = serie.astype("string").str.strip().str.replace(r"\.0$", "", regex=True)
+    if tipo == "cnpj":
+        texto = texto.str.replace(r"\D", "", regex=True)
+        return texto.replace("", pd.NA).str.zfill(14)
+    return texto.replace("", pd.NA)
+
+
+def tipar(df: pd.DataFrame, tipo: str) -> pd.DataFrame:
+    # colunas de ESPECIFICACOES[tipo] com os tipos do banco (texto/CNPJ como string,
+    # vazio -> NA, data como datetime, inteiro como Int64), na ordem da especificação;
+    # as demais colunas vêm depois, sem conversão
+    espec = ESPECIFICACOES[tipo]["colunas"]
+    for col, (_, tipo_col) in espec.items():
+        if col in df.columns:
+            df[col] = _para_data(df[col]) if tipo_col == "data" else _converter(df[col], tipo_col)
+    return df[[c for c in espec if c in df.columns] + [c for c in df.columns if c not in espec]]
+
+
+def preparar_linhas(df: pd.DataFrame, tipo: str) -> pd.DataFrame:
+    # uma linha de saída por linha da planilha, na mesma ordem
+    espec = ESPECIFICACOES[tipo]
+    saida = pd.DataFrame({"linha": range(len(df))}, index=df.index)
+    for col_planilha, (col_db, tipo_col) in espec["colunas"].items():
+        if col_planilha in df.columns:
+            saida[col_db] = _converter(df[col_planilha], tipo_col)
+        else:
+            saida[col_db] = pd.NA
+    saida["mes"] = saida["data_base"].str[:7]
+
+    resto = [c for c in df.columns if c not in espec["colunas"]]
+    if resto:
+        extras = df[resto].astype(object).where(df[resto].notna(), None)
+        saida["extras"] = [json.dumps(r, ensure_ascii=False, default=str) for r in extras.to_dict("records")]
+    else:
+        saida["extras"] = None
+    return saida
+
+
+def _lotes(df: pd.DataFrame, tamanho: int = TAMANHO_LOTE):
+    valores = df.astype(object).where(df.notna(), None)
+    for inicio in range(0, len(valores), tamanho):
+        yield list(valores.iloc[inicio:inicio + tamanho].itertuples(index=False, name=None))
+
+# ---------------------------
+# Carga
+# ---------------------------
+
+def _chave_arquivo(caminho: Path) -> str:
+    # caminho relativo à pasta do app (ou absoluto, se estiver fora dela)
+    caminho = caminho.resolve()
+    return caminho.relative_to(BASE_DIR).as_posix() if caminho.is_relative_to(BASE_DIR) else str(caminho)
+
+
+def carregar_arquivo(conn: sqlite3.Connection, caminho: Path, forcar: bool = False) -> str:
+    tipo = tipo_do_arquivo(caminho)
+    if tipo is None:
+        return "ignorado (tipo desconhecido)"
+
+    caminho_rel = _chave_arquivo(caminho)
+    info = caminho.stat()
+    sha = sha256_arquivo(caminho)
+    registrado = conn.execute("SELECT sha256 FROM arquivos_carregados WHERE caminho = ?", (caminho_rel,)).fetchone()
+    if registrado and registrado[0] == sha and not forcar:
+        # mesmo conteúdo com mtime novo (arquivo copiado de novo): só atualiza o registro,
+        # para ler_arquivo continuar reconhecendo o arquivo como atual
+        with conn:
+            conn.execute(
+                "UPDATE arquivos_carregados SET tamanho = ?, mtime_ns = ? WHERE caminho = ?",
+                (info.st_size, info.st_mtime_ns, caminho_rel),
+            )
+        return "sem mudanças"
+
+    df = _ler_planilha(caminho)
+    espec = ESPECIFICACOES[tipo]
+    faltando = [c for c in espec["obrigatorias"] if c not in df.columns]
+    if faltando:
+        return f"ignorado (sem colunas obrigatórias: {', '.join(faltando)})"
+
+    linhas = preparar_linhas(df, tipo)
+    linhas.insert(0, "arquivo", caminho_rel)
+    colunas = list(linhas.columns)
+    sql = f"""
+        INSERT INTO {espec['tabela']} ({", ".join(colunas)})
+        VALUES ({", ".join("?" * len(colunas))})
+    """
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # o arquivo é substituído por inteiro: linhas removidas da planilha somem do banco
+        conn.execute(f"DELETE FROM {espec['tabela']} WHERE arquivo = ?", (caminho_rel,))
+        for lote in _lotes(linhas):
+            conn.executemany(sql, lote)
+        conn.execute("""
+            INSERT INTO arquivos_carregados (caminho, tipo, sha256, tamanho, mtime_ns, linhas, carregado_em)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(caminho) DO UPDATE SET
+                tipo = excluded.tipo, sha256 = excluded.sha256, tamanho = excluded.tamanho,
+                mtime_ns = excluded.mtime_ns, linhas = excluded.linhas, carregado_em = excluded.carregado_em
+        """, (caminho_rel, tipo, sha, info.st_size, info.st_mtime_ns, len(linhas), datetime.now().isoformat(timespec="seconds")))
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
+    return f"{len(linhas)} linhas carregadas em {espec['tabela']}"
+
+
+def arquivos_padrao() -> list:
+    return [p for p in manifesto.Manifesto(fontes.PASTAS_PADRAO).arquivos() if tipo_do_arquivo(p)]
+
+
+def ingerir(arquivos=None, forcar: bool = False, db_path=DB_PATH) -> dict:
+    conn = conectar(db_path)
+    try:
+        criar_schema(conn)
+        resultados = {}
+        for caminho in arquivos or arquivos_padrao():
+            resultados[str(caminho)] = carregar_arquivo(conn, Path(caminho), forcar)
+        conn.execute("PRAGMA optimize")
+        return resultados
+    finally:
+        conn.close()
+
+# ---------------------------
+# Consulta pelos dashboards
+# ---------------------------
+
+def ler_arquivo(caminho, db_path=DB_PATH, colunas=None) -> pd.DataFrame | None:
+    # Devolve as linhas da planilha `caminho`, na ordem original e com os nomes de
+    # coluna da planilha (tipadas por tipar), ou None se o banco não tem a versão
+    # atual do arquivo (nunca carregado, ou republicado depois da última ingestão).
+    # colunas (opcional): só essas colunas são lidas; extras só é decodificado se
+    # alguma delas não está na especificação.
+    caminho = Path(caminho)
+    tipo = tipo_do_arquivo(caminho)
+    if tipo is None or not Path(db_path).exists():
+        return None
+    espec = ESPECIFICACOES[tipo]
+    mapa = {col_db: col for col, (col_db, _) in espec["colunas"].items() if colunas is None or col in colunas}
+    com_extras = colunas is None or any(c not in espec["colunas"] for c in colunas)
+    selecao = ["linha", *mapa] + (["extras"] if com_extras else [])
+    caminho_rel = _chave_arquivo(caminho)
+    conn = conectar(db_path)
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] != VERSAO_SCHEMA:
+            return None
+        registro = conn.execute(
+            "SELECT sha256, tamanho, mtime_ns FROM arquivos_carregados WHERE caminho = ?", (caminho_rel,)
+        ).fetchone()
+        if registro is None:
+            return None
+        info = caminho.stat()
+        # hash só quando tamanho/mtime mudaram (o arquivo inteiro é lido para isso)
+        if registro[1:] != (info.st_size, info.st_mtime_ns) and registro[0] != sha256_arquivo(caminho):
+            return None
+        df = pd.read_sql_query(
+            f"SELECT {', '.join(selecao)} FROM {espec['tabela']} WHERE arquivo = ? ORDER BY linha",
+            conn, params=(caminho_rel,),
+        )
+    finally:
+        conn.close()
+
+    extras = df.pop("extras") if com_extras else None
+    df = df.drop(columns=["linha"]).rename(columns=mapa)
+    if extras is not None and extras.notna().any():
+        df_extras = pd.DataFrame.from_records(extras.fillna("{}").map(json.loads).tolist(), index=df.index)
+        df = pd.concat([df, df_extras], axis=1)
+    if colunas is not None:
+        df = df[[c for c in df.columns if c in colunas]]
+    # datas gravadas em ISO; convertidas antes de tipar, que lê texto com dayfirst
+    for col, (_, tipo_col) in espec["colunas"].items():
+        if tipo_col == "data" and col in df.columns:
+            df[col] = pd.to_datetime(df[col], format="%Y-%m-%d", errors="coerce")
+    return tipar(df, tipo)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carrega planilhas de produção/balde no producao.db")
+    parser.add_argument("arquivos", nargs="*", help="arquivos .xlsx/.csv (padrão: pasta atual e arq/)")
+    parser.add_argument("--forcar", action="store_true", help="recarrega arquivos já carregados")
+    parser.add_argument("--db", default=str(DB_PATH), help="caminho do banco SQLite")
+    args = parser.parse_args()
+
+    for arquivo, resultado in ingerir(args.arquivos, args.forcar, args.db).items():
+        print(f"{arquivo}: {resultado}")
@@ -0,0 +1,110 @@
+# manifesto.py — índice das planilhas disponíveis por tipo e mês
+#
+# Os nomes seguem <tipo>_<AAAA-MM>.xlsx (ou sem o "_", ex.: balde_quali2026-03.xlsx).
+# O índice é montado com uma varredura das pastas da fonte local e só é refeito
+# para a pasta cujo mtime mudou (arquivo novo, removido ou renomeado); a cada
+# rerun o custo é um stat por pasta, e as consultas são buscas em dicionário.
+# Publicar um mês novo = copiar o arquivo para a pasta; não há lista no código.
+import re
+import threading
+from pathlib import Path
+
+import fontes
+
+# do mais específico para o mais genérico (producao_prospec antes de producao)
+TIPOS = ("producao_prospec", "producao", "balde_quali", "balde_c6pay", "balde")
+PADRAO_NOME = re.compile(
+    rf"^(?P<tipo>{'|'.join(TIPOS)})_?(?P<mes>\d{{4}}-\d{{2}})\.(?:xlsx|csv)$", re.IGNORECASE
+)
+
+
+def classificar(nome_arquivo: str) -> tuple | None:
+    # "producao_2026-03.xlsx" -> ("producao", "2026-03"); nome fora do padrão -> None
+    m = PADRAO_NOME.match(nome_arquivo)
+    return (m["tipo"].lower(), m["mes"]) if m else None
+
+
+class Manifesto:
+    def __init__(self, pastas):
+        self.pastas = [Path(p) for p in pastas]
+        self._lock = threading.Lock()
+        self._mtimes = {}      # pasta -> mtime_ns da última varredura
+        self._por_pasta = {}   # pasta -> {(tipo, mes): caminho}
+        self._indice = {}      # (tipo, mes) -> caminho (a primeira pasta prevalece)
+        self._meses = {}       # tipo -> [meses em ordem]
+
+    @staticmethod
+    def _varrer(pasta: Path) -> dict:
+        encontrados = {}
+        for caminho in pasta.iterdir():
+            chave = classificar(caminho.name)
+            if chave and caminho.is_file():
+                encontrados[chave] = caminho
+        return encontrados
+
+    def atualizar(self) -> None:
+        with self._lock:
+            mudou = False
+            for pasta in self.pastas:
+                try:
+                    mtime = pasta.stat().st_mtime_ns
+                except FileNotFoundError:
+                    mtime = None
+                if self._mtimes.get(pasta, -1) == mtime:
+                    continue
+                self._por_pasta[pasta] = self._varrer(pasta) if mtime is not None else {}
+                self._mtimes[pasta] = mtime
+                mudou = True
+            if not mudou:
+                return
+            indice = {}
+            for pasta in reversed(self.pastas):
+                indice.update(self._por_pasta[pasta])
+            meses = {}
+            for tipo, mes in sorted(indice):
+                meses.setdefault(tipo, []).append(mes)
+            self._indice, self._meses = indice, meses
+
+    def meses(self, tipo: str) -> list:
+        self.atualizar()
+        return list(self._meses.get(tipo, []))
+
+    def ultimo_mes(self, tipo: str) -> str | None:
+        self.atualizar()
+        meses = self._meses.get(tipo)
+        return meses[-1] if meses else None
+
+    def caminho(self, tipo: str, mes: str) -> Path | None:
+        self.atualizar()
+        return self._indice.get((tipo, mes))
+
+    def arquivos(self) -> list:
+        self.atualizar()
+        return sorted(self._indice.values())
+
+
+_manifestos = {}
+_manifestos_lock = threading.Lock()
+
+
+def atual() -> Manifesto:
+    # um manifesto por conjunto de pastas da fonte local configurada em fontes.py
+    pastas = tuple(fontes.pastas_locais())
+    with _manifestos_lock:
+        if pastas not in _manifestos:
+            _manifestos[pastas] = Manifesto(pastas)
+        return _manifestos[pastas]
+
+
+def meses(tipo: str) -> list:
+    return atual().meses(tipo)
+
+
+def ultimo_mes(tipo: str) -> str | None:
+    return atual().ultimo_mes(tipo)
+
+
+if __name__ == "__main__":
+    m = atual()
+    for tipo in TIPOS:
+        print(f"{tipo}: {', '.join(m.meses(tipo)) or '-'}")
@@ -0,0 +1,28 @@
+# particoes.py — índice de linhas por consultor
+#
+# Quase todas as sessões são de consultores que só veem as próprias linhas. Em vez
+# de normalizar e comparar a coluna CONSULTOR inteira a cada rerun, o índice
+# (chave normalizada -> posições das linhas) é montado uma vez por versão do
+# conjunto, junto com ele no cache, e cada sessão pega sua fatia com um get + iloc.
+import numpy as np
+import pandas as pd
+
+_SEM_LINHAS = np.array([], dtype=np.intp)
+
+
+def chave_consultor(nome) -> str:
+    return str(nome or "").strip().casefold()
+
+
+def indexar_por_consultor(df: pd.DataFrame, coluna: str = "CONSULTOR") -> dict:
+    if coluna not in df.columns:
+        return {}
+    chaves = df[coluna].astype("string").str.strip().str.casefold()
+    indice = chaves.groupby(chaves, sort=False).indices
+    for posicoes in indice.values():
+        posicoes.flags.writeable = False  # compartilhado entre sessões
+    return indice
+
+
+def fatia(df: pd.DataFrame, indice: dict, nome) -> pd.DataFrame:
+    return df.iloc[indice.get(chave_consultor(nome), _SEM_LINHAS)]
@@ -0,0 +1,161 @@
+# planilhas.py — leitura das planilhas (xlsx/csv) com cópia Parquet em disco
+#
+# Ler xlsx com openpyxl é a etapa mais lenta dos dashboards. Cada planilha
+# (local ou baixada por fontes.py) é lida uma vez e gravada em .cache_planilhas/
+# como Parquet; as leituras seguintes (inclusive após reiniciar o servidor) vêm
+# do arquivo colunar.
+# A chave do cache é (caminho absoluto, tamanho, mtime, dtype, colunas): se a
+# planilha for substituída, a cópia antiga deixa de valer e é apagada na próxima gravação.
+#
+# Com `colunas` ({coluna: tipo}), o xlsx é lido em streaming (openpyxl read_only,
+# linha a linha): só as colunas pedidas são guardadas, convertidas em lotes de
+# TAMANHO_LOTE linhas para Arrow. A memória de pico fica em ~um lote + o resultado,
+# em vez da árvore inteira da pasta de trabalho que o pd.read_excel monta.
+import glob
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow  # também é o engine do to_parquet/read_parquet
+except ImportError:  # sem pyarrow lemos direto da planilha, sem cache
+    pyarrow = None
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+BASE_DIR = Path(__file__).resolve().parent
+CACHE_DIR = BASE_DIR / ".cache_planilhas"
+TAMANHO_LOTE = 5000
+
+# tipos aceitos em `colunas`
+TIPOS_ARROW = {
+    "texto": "string",
+    "real": "float64",
+    "data": "timestamp[us]",
+}
+
+
+def _ler_original(origem, dtype: dict | None) -> pd.DataFrame:
+    if str(origem).lower().endswith(".csv"):
+        df = pd.read_csv(origem, dtype=dtype)
+    else:
+        df = pd.read_excel(origem, dtype=dtype)
+    df.columns = [c.strip() if isinstance(c, str) else c for c in df.columns]
+    return df
+
+
+def _texto(valor):
+    # números inteiros lidos como float (ex.: telefones) perdem o ".0"
+    if valor is None:
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip()
+
+
+def _converter_lote(valores: list, tipo: str):
+    if tipo == "real":
+        return pyarrow.array(pd.to_numeric(pd.Series(valores, dtype=object), errors="coerce"), type=pyarrow.float64())
+    if tipo == "data":
+        datas = pd.to_datetime(pd.Series(valores, dtype=object), errors="coerce", dayfirst=True, format="mixed")
+        return pyarrow.array(datas, type=pyarrow.timestamp("us"))
+    return pyarrow.array([_texto(v) for v in valores], type=pyarrow.string())
+
+
+def ler_xlsx_colunas(caminho, colunas: dict, tamanho_lote: int = TAMANHO_LOTE) -> pd.DataFrame:
+    # colunas: {nome no cabeçalho: "texto" | "real" | "data"}; as ausentes na planilha são ignoradas
+    wb = openpyxl.load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        linhas = wb.worksheets[0].iter_rows(values_only=True)
+        cabecalho = [c.strip() if isinstance(c, str) else c for c in next(linhas, ())]
+        posicoes = {col: cabecalho.index(col) for col in colunas if col in cabecalho}
+        schema = pyarrow.schema([(col, TIPOS_ARROW[colunas[col]]) for col in posicoes])
+
+        lotes = []
+        pendentes = {col: [] for col in posicoes}
+        n = 0
+        for linha in linhas:
+            if all(v is None for v in linha):
+                continue  # linhas vazias (formatação sobrando no fim da planilha)
+            for col, i in posicoes.items():
+                pendentes[col].append(linha[i] if i < len(linha) else None)
+            n += 1
+            if n == tamanho_lote:
+                lotes.append(pyarrow.record_batch(
+                    [_converter_lote(pendentes[col], colunas[col]) for col in posicoes], schema=schema
+                ))
+                pendentes = {col: [] for col in posicoes}
+                n = 0
+        if n:
+            lotes.append(pyarrow.record_batch(
+                [_converter_lote(pendentes[col], colunas[col]) for col in posicoes], schema=schema
+            ))
+    finally:
+        wb.close()
+    return pyarrow.Table.from_batches(lotes, schema=schema).to_pandas()
+
+
+def _ler_colunas(caminho: Path, colunas: dict) -> pd.DataFrame:
+    if caminho.suffix.lower() != ".csv" and openpyxl is not None and pyarrow is not None:
+        return ler_xlsx_colunas(caminho, colunas)
+    df = _ler_original(caminho, None)
+    return df[[c for c in colunas if c in df.columns]]
+
+
+def _prefixo_cache(caminho: Path, dtype: dict | None, colunas: dict | None = None) -> str:
+    chave = f"{caminho}|{sorted((dtype or {}).items(), key=str)}|{sorted((colunas or {}).items())}"
+    return f"{caminho.stem}-{hashlib.sha1(chave.encode()).hexdigest()[:12]}"
+
+
+def _tipar_colunas_mistas(df: pd.DataFrame) -> pd.DataFrame:
+    # Colunas com números e textos misturados (comum em planilhas digitadas à mão)
+    # não têm tipo Parquet; viram texto, mantendo os vazios como nulos.
+    for col in df.columns[df.dtypes == object]:
+        if pd.api.types.infer_dtype(df[col], skipna=True).startswith("mixed"):
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+
+def ler_planilha(caminho, dtype: dict | None = None, colunas: dict | None = None) -> pd.DataFrame:
+    # caminho local, normalmente vindo de fontes.caminho(nome_arquivo);
+    # colunas (opcional) = projeção tipada lida em streaming, ver ler_xlsx_colunas
+    caminho = Path(caminho).resolve()
+    if pyarrow is None:
+        return _ler_colunas(caminho, colunas) if colunas else _ler_original(caminho, dtype)
+
+    info = caminho.stat()
+    prefixo = _prefixo_cache(caminho, dtype, colunas)
+    arquivo_cache = CACHE_DIR / f"{prefixo}.{info.st_size}.{info.st_mtime_ns}.parquet"
+    if arquivo_cache.is_file():
+        return pd.read_parquet(arquivo_cache)
+
+    if colunas:
+        df = _ler_colunas(caminho, colunas)
+    else:
+        df = _tipar_colunas_mistas(_ler_original(caminho, dtype))
+    if not all(isinstance(c, str) for c in df.columns):
+        return df  # Parquet exige nomes de coluna em texto
+
+    CACHE_DIR.mkdir(exist_ok=True)
+    # grava num temporário exclusivo e renomeia: sessões são threads do mesmo processo
+    # (e carregar_periodo lê meses em paralelo), então o nome não pode depender só do pid;
+    # ninguém lê um Parquet pela metade
+    with tempfile.NamedTemporaryFile(dir=CACHE_DIR, prefix=f"{prefixo}.", suffix=".tmp", delete=False) as f:
+        temporario = Path(f.name)
+    try:
+        df.to_parquet(temporario, index=False)
+        os.replace(temporario, arquivo_cache)
+    except BaseException:
+        temporario.unlink(missing_ok=True)
+        raise
+    # cópias de versões anteriores da mesma planilha (outro tamanho/mtime)
+    for antigo in CACHE_DIR.glob(f"{glob.escape(prefixo)}.*.parquet"):
+        if antigo != arquivo_cache:
+            antigo.unlink(missing_ok=True)
+    return df
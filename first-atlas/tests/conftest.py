@@ -0,0 +1,5 @@
+# os módulos do app são importados pelo nome (como o streamlit faz ao rodar da pasta first-atlas)
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
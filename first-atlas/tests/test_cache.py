@@ -0,0 +1,42 @@
+# CacheDados: carga única com sessões concorrentes e visões que não alteram a entrada
+import threading
+import time
+
+import pandas as pd
+
+import cache
+
+
+def test_carrega_uma_vez_com_chamadas_concorrentes():
+    dados = cache.CacheDados()
+    cargas = []
+
+    def carregar():
+        cargas.append(1)
+        time.sleep(0.05)
+        return pd.DataFrame({"a": range(10)})
+
+    resultados = []
+    threads = [threading.Thread(target=lambda: resultados.append(dados.obter("k", carregar))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # mais chamadas depois da carga: encontram a entrada, sem trava pendente
+    resultados.append(dados.obter("k", carregar))
+
+    assert len(cargas) == 1
+    assert len(resultados) == 9
+    assert dados.estatisticas()["misses"] == 1
+    assert dados._carregando == {}
+
+
+def test_visao_nao_altera_entrada():
+    dados = cache.CacheDados()
+    carregar = lambda: (pd.DataFrame({"a": [1, 2, 3]}), {"x": [0]})  # noqa: E731
+    df, indice = dados.obter("k", carregar)
+    df.loc[0, "a"] = 99
+    df["b"] = 1
+    df_de_novo, _ = dados.obter("k", carregar)
+    assert df_de_novo["a"].tolist() == [1, 2, 3]
+    assert "b" not in df_de_novo.columns
@@ -0,0 +1,51 @@
+# exportação em lotes: vários meses com colunas e categorias diferentes saem num arquivo só
+import io
+
+import pandas as pd
+import pytest
+
+import exportacao
+
+
+@pytest.fixture
+def meses(monkeypatch):
+    monkeypatch.setattr(exportacao, "TAMANHO_LOTE", 2)
+    janeiro = pd.DataFrame({
+        "DATA_BASE": pd.to_datetime(["2026-01-02", "2026-01-05", "2026-01-06"]),
+        "CNPJ": pd.array(["00123456000199", "11222333000144", pd.NA], dtype="string"),
+        "CONSULTOR": pd.Categorical(["Ana", "Bia", "Ana"]),
+    })
+    fevereiro = pd.DataFrame({
+        "DATA_BASE": pd.to_datetime(["2026-02-02"]),
+        "CNPJ": pd.array(["00999888000177"], dtype="string"),
+        "CONSULTOR": pd.Categorical(["Caio"]),
+        "LIDER": pd.array(["Felipe"], dtype="string"),
+    })
+    return [janeiro, fevereiro]
+
+
+def test_lotes_com_colunas_e_tipos_fixos(meses):
+    lotes = list(exportacao.lotes(meses))
+    assert [len(lote) for lote in lotes] == [2, 1, 1]
+    assert all(list(lote.columns) == ["DATA_BASE", "CNPJ", "CONSULTOR", "LIDER"] for lote in lotes)
+    assert all(str(lote["CONSULTOR"].dtype) == "string" for lote in lotes)
+    assert lotes[0]["LIDER"].isna().all() and lotes[-1]["LIDER"].tolist() == ["Felipe"]
+
+
+@pytest.mark.parametrize("formato", exportacao.formatos_disponiveis())
+def test_arquivo_tem_todos_os_meses(meses, formato):
+    conteudo = io.BytesIO(exportacao.gerar_arquivo(formato, meses))
+    if formato == "csv":
+        df = pd.read_csv(conteudo, sep=";", encoding="utf-8-sig", dtype={"CNPJ": str})
+    elif formato == "parquet":
+        df = pd.read_parquet(conteudo)
+    else:
+        df = pd.read_excel(conteudo, dtype={"CNPJ": str})
+    assert df["CONSULTOR"].tolist() == ["Ana", "Bia", "Ana", "Caio"]
+    assert df["CNPJ"].iloc[0] == "00123456000199"
+    assert df["LIDER"].notna().sum() == 1
+
+
+def test_nome_arquivo():
+    assert exportacao.nome_arquivo("csv", ("2026-03",)) == "contas_2026-03.csv"
+    assert exportacao.nome_arquivo("xlsx", ("2026-01", "2026-03")) == "contas_2026-01_a_2026-03.xlsx"
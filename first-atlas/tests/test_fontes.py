@@ -0,0 +1,85 @@
+# FonteHTTP contra um http.server local: 200 baixa, 304 reaproveita a cópia, ETag novo baixa de novo
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import fontes
+
+
+class Publicacao:
+    def __init__(self):
+        self.conteudo = b"versao 1"
+        self.etag = '"v1"'
+        self.respostas = []  # status de cada requisição atendida
+        self.cabecalhos = []  # If-None-Match recebido em cada requisição
+
+
+@pytest.fixture
+def servidor():
+    publicacao = Publicacao()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            publicacao.cabecalhos.append(self.headers.get("If-None-Match"))
+            if self.path != "/producao_2026-03.xlsx":
+                status = 404
+            elif self.headers.get("If-None-Match") == publicacao.etag:
+                status = 304
+            else:
+                status = 200
+            publicacao.respostas.append(status)
+            self.send_response(status)
+            if status == 200:
+                self.send_header("ETag", publicacao.etag)
+                self.send_header("Content-Length", str(len(publicacao.conteudo)))
+            self.end_headers()
+            if status == 200:
+                self.wfile.write(publicacao.conteudo)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/", publicacao
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_etag_304_e_nova_versao(servidor, tmp_path):
+    url_base, publicacao = servidor
+    fonte = fontes.FonteHTTP(url_base, pasta_cache=tmp_path)
+
+    caminho = fonte.caminho("producao_2026-03.xlsx")
+    assert caminho.read_bytes() == b"versao 1"
+    assert publicacao.respostas == [200]
+    assert publicacao.cabecalhos == [None]
+
+    mtime = caminho.stat().st_mtime_ns
+    assert fonte.caminho("producao_2026-03.xlsx") == caminho
+    assert publicacao.respostas == [200, 304]
+    assert publicacao.cabecalhos[-1] == '"v1"'
+    assert caminho.read_bytes() == b"versao 1"
+    assert caminho.stat().st_mtime_ns == mtime  # 304 não regrava a cópia
+
+    publicacao.conteudo, publicacao.etag = b"versao 2", '"v2"'
+    assert fonte.caminho("producao_2026-03.xlsx").read_bytes() == b"versao 2"
+    assert publicacao.respostas == [200, 304, 200]
+    assert publicacao.cabecalhos[-1] == '"v1"'
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_404_vira_file_not_found(servidor, tmp_path):
+    url_base, _ = servidor
+    with pytest.raises(FileNotFoundError):
+        fontes.FonteHTTP(url_base, pasta_cache=tmp_path).caminho("producao_1999-01.xlsx")
+
+
+def test_sem_rede_reaproveita_copia(servidor, tmp_path):
+    url_base, _ = servidor
+    caminho = fontes.FonteHTTP(url_base, pasta_cache=tmp_path).caminho("producao_2026-03.xlsx")
+    # porta fechada: URLError, serve a última cópia baixada
+    offline = fontes.FonteHTTP("http://127.0.0.1:9/", pasta_cache=tmp_path, timeout=2)
+    assert offline.caminho("producao_2026-03.xlsx").read_bytes() == caminho.read_bytes()
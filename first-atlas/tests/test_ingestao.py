@@ -0,0 +1,92 @@
+# ler_arquivo (producao.db) e a leitura direta da planilha devolvem o mesmo frame;
+# o SHA-256 só é calculado quando tamanho/mtime do arquivo mudaram
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import ingestao
+import planilhas
+
+PASTA_APP = Path(__file__).resolve().parent.parent
+COLUNAS_BALDE = {
+    "CNPJ_CLIENTE": "texto", "CONSULTOR": "texto", "STATUS": "texto", "TELEFONE_MASTER": "texto",
+    "DT_QUALIFICADA": "data", "FL_QUALIFICADO": "real", "CASH_IN_ATUAL": "real", "OBS": "texto",
+}
+
+
+@pytest.fixture
+def pasta(tmp_path, monkeypatch):
+    monkeypatch.setattr(planilhas, "CACHE_DIR", tmp_path / "cache")
+    return tmp_path
+
+
+def _balde(pasta: Path) -> Path:
+    caminho = pasta / "balde_2026-03.xlsx"
+    pd.DataFrame({
+        "DATA_BASE": [datetime(2026, 3, 1)] * 3,
+        "CNPJ_CLIENTE": [123456000199, 4567000100, None],
+        "CONSULTOR": [" Ana ", "", "Bia"],
+        "STATUS": ["QUALIFICADO", None, " promessa"],
+        "TELEFONE_MASTER": [11987654321.0, None, 11912345678.0],
+        "DT_QUALIFICADA": [datetime(2026, 3, 5), None, datetime(2026, 3, 20)],
+        "FL_QUALIFICADO": [1.0, 0.0, None],
+        "CASH_IN_ATUAL": [1500.5, None, 0.0],
+        "OBS": ["x", None, "z"],
+    }).to_excel(caminho, index=False)
+    return caminho
+
+
+def test_producao_banco_igual_planilha(pasta):
+    caminho = shutil.copy(PASTA_APP / "producao_2026-03.xlsx", pasta / "producao_2026-03.xlsx")
+    db = pasta / "producao.db"
+    assert ingestao.ler_arquivo(caminho, db) is None
+    ingestao.ingerir([caminho], db_path=db)
+
+    do_banco = ingestao.ler_arquivo(caminho, db)
+    da_planilha = ingestao.tipar(planilhas.ler_planilha(caminho, dtype={"CNPJ": str}), "producao")
+    pd.testing.assert_frame_equal(do_banco, da_planilha)
+    assert str(do_banco["CNPJ"].dtype) == "string"
+    assert do_banco["CNPJ"].str.len().eq(14).all()
+
+
+def test_balde_banco_igual_planilha(pasta):
+    caminho = _balde(pasta)
+    db = pasta / "producao.db"
+    ingestao.ingerir([caminho], db_path=db)
+
+    do_banco = ingestao.ler_arquivo(caminho, db, colunas=COLUNAS_BALDE)
+    da_planilha = ingestao.tipar(planilhas.ler_planilha(caminho, colunas=COLUNAS_BALDE), "balde")
+    pd.testing.assert_frame_equal(do_banco, da_planilha)
+    assert do_banco["CNPJ_CLIENTE"].tolist() == ["00123456000199", "00004567000100", pd.NA]
+    assert do_banco["CONSULTOR"].tolist() == ["Ana", pd.NA, "Bia"]
+    assert do_banco["TELEFONE_MASTER"].tolist() == ["11987654321", pd.NA, "11912345678"]
+    assert str(do_banco["FL_QUALIFICADO"].dtype) == "Int64"
+    assert "DATA_BASE" not in do_banco.columns
+
+
+def test_hash_so_quando_tamanho_ou_mtime_mudam(pasta, monkeypatch):
+    caminho = _balde(pasta)
+    db = pasta / "producao.db"
+    ingestao.ingerir([caminho], db_path=db)
+
+    hashes = []
+    sha256_original = ingestao.sha256_arquivo
+    monkeypatch.setattr(ingestao, "sha256_arquivo", lambda c: hashes.append(c) or sha256_original(c))
+    assert ingestao.ler_arquivo(caminho, db) is not None
+    assert hashes == []
+
+    # mesmo conteúdo com mtime novo: um hash, e o banco continua valendo
+    info = caminho.stat()
+    os.utime(caminho, ns=(info.st_atime_ns, info.st_mtime_ns + 10**9))
+    assert ingestao.ler_arquivo(caminho, db) is not None
+    assert len(hashes) == 1
+
+    # conteúdo novo: a planilha é que vale
+    _balde(pasta)
+    with open(caminho, "ab") as f:
+        f.write(b"\0")
+    assert ingestao.ler_arquivo(caminho, db) is None